@@ -1,15 +1,33 @@
 import time
 import tracemalloc
+from Constants import ROWS, COLUMNS
 from GameController import GameController
 from FeatureBasedHeuristic import FeatureBasedHeuristicAgent
 from BoardHeuristic import BoardHeuristicAI
+from GameRecords import GameRecordWriter
+from Utility import game_seed, seed_agents
 
 class AlgorithmTester:
     def __init__(self):
         self.results = []
 
-    def test_algorithms(self, num_games=10):
-        """Run a series of games between Feature-Based and Board-Based heuristics."""
+    def test_algorithms(self, num_games=10, seed=None, worker_id=0, oracle=None, record_path=None, rows=ROWS,
+                        columns=COLUMNS, memory_profiler=None, search_profiler=None):
+        """
+        Run a series of games between Feature-Based and Board-Based heuristics.
+        :param num_games: Number of games to play
+        :param seed: Tournament seed; each game derives its own seed from it
+        :param worker_id: Index of the worker running these games
+        :param oracle: Optional SolverOracle grading every move it can solve
+        :param record_path: Optional game log every game is appended to (see GameRecords)
+        :param rows: Number of board rows
+        :param columns: Number of board columns
+        :param memory_profiler: Optional MemoryProfiler recording a memory timeline of every game instead of
+            tracing allocations per move (the memory metrics are then the agents' retained state); its sampler
+            is stopped when the games end, closing it is left to the caller
+        :param search_profiler: Optional SearchProfiler collecting the hot functions of both agents' searches
+            (pass a memory_profiler too, or the profile includes the cost of tracemalloc)
+        """
         agent1 = FeatureBasedHeuristicAgent()
         agent2 = BoardHeuristicAI()
 
@@ -26,58 +44,114 @@ class AlgorithmTester:
             "agent2_execution_time": [],
             "agent1_memory_usage": [],
             "agent2_memory_usage": [],
+            "agent1_graded_moves": 0,
+            "agent2_graded_moves": 0,
+            "agent1_optimal_moves": 0,
+            "agent2_optimal_moves": 0,
         }
 
-        for game_num in range(num_games):
-            print(f"\nGame {game_num + 1}/{num_games}")
-            controller = GameController()
-            controller.agent_1 = agent1  # Set Player 1
-            controller.agent_2 = agent2  # Set Player 2
-            controller.game.current_player = 1  # Feature-Based starts
-
-            while not controller.game.game_over:
-                if controller.game.current_player == 1:
-                    # Measure execution time and memory usage for Feature-Based Heuristic
-                    tracemalloc.start()
-                    start_time = time.time()
-                    col = agent1.get_move(controller.game)
-                    end_time = time.time()
-                    current, peak = tracemalloc.get_traced_memory()
-                    tracemalloc.stop()
-
-                    metrics["agent1_execution_time"].append(end_time - start_time)
-                    metrics["agent1_memory_usage"].append(peak / 10**6)
-                else:
-                    # Measure execution time and memory usage for Board-Based Heuristic
-                    tracemalloc.start()
-                    start_time = time.time()
-                    col = agent2.get_best_move(controller.game)
-                    end_time = time.time()
-                    current, peak = tracemalloc.get_traced_memory()
-                    tracemalloc.stop()
-
-                    metrics["agent2_execution_time"].append(end_time - start_time)
-                    metrics["agent2_memory_usage"].append(peak / 10**6)
-
-                # Execute the move
-                controller.game.drop_piece(col)
-
-                # Check if the game has ended
-                winner = controller.game.check_winner()
-                if winner:
-                    controller.game.game_over = True
-                    if winner == 1:
-                        agent1_wins += 1
+        recorder = (GameRecordWriter(record_path, columns, rows, seed, worker_id, num_games)
+                    if record_path is not None else None)
+
+        try:
+            for game_num in range(num_games):
+                print(f"\nGame {game_num + 1}/{num_games}")
+                controller = GameController(rows=rows, columns=columns)
+                controller.agent_1 = agent1  # Set Player 1
+                controller.agent_2 = agent2  # Set Player 2
+                controller.game.current_player = 1  # Feature-Based starts
+                seed_agents([agent1, agent2], game_seed(seed, game_num, worker_id))
+                moves, timings = [], []
+                if memory_profiler is not None:
+                    memory_profiler.start_game(game_num)
+
+                while not controller.game.game_over:
+                    if controller.game.current_player == 1:
+                        # Measure execution time and memory usage for Feature-Based Heuristic
+                        if memory_profiler is None:
+                            tracemalloc.start()
+                        else:
+                            memory_profiler.start_move()
+                        if search_profiler is not None:
+                            search_profiler.start(agent1_name)
+                        start_time = time.time()
+                        col = agent1.get_move(controller.game)
+                        end_time = time.time()
+                        if search_profiler is not None:
+                            search_profiler.stop()
+                        if memory_profiler is None:
+                            current, peak = tracemalloc.get_traced_memory()
+                            tracemalloc.stop()
+                        else:
+                            peak = memory_profiler.end_move(agent1_name, agent1, end_time - start_time)
+
+                        metrics["agent1_execution_time"].append(end_time - start_time)
+                        timings.append(end_time - start_time)
+                        metrics["agent1_memory_usage"].append(peak / 10**6)
                     else:
-                        agent2_wins += 1
-                elif controller.game.is_draw():
-                    controller.game.game_over = True
-                    draws += 1
-                else:
-                    controller.game.switch_player()
+                        # Measure execution time and memory usage for Board-Based Heuristic
+                        if memory_profiler is None:
+                            tracemalloc.start()
+                        else:
+                            memory_profiler.start_move()
+                        if search_profiler is not None:
+                            search_profiler.start(agent2_name)
+                        start_time = time.time()
+                        col = agent2.get_best_move(controller.game)
+                        end_time = time.time()
+                        if search_profiler is not None:
+                            search_profiler.stop()
+                        if memory_profiler is None:
+                            current, peak = tracemalloc.get_traced_memory()
+                            tracemalloc.stop()
+                        else:
+                            peak = memory_profiler.end_move(agent2_name, agent2, end_time - start_time)
+
+                        metrics["agent2_execution_time"].append(end_time - start_time)
+                        timings.append(end_time - start_time)
+                        metrics["agent2_memory_usage"].append(peak / 10**6)
+
+                    # Grade the move against the exact solution
+                    if oracle is not None:
+                        grade = oracle.grade(controller.game, col)
+                        if grade is not None:
+                            agent_name = f"agent{controller.game.current_player}"
+                            metrics[f"{agent_name}_graded_moves"] += 1
+                            metrics[f"{agent_name}_optimal_moves"] += grade[0] == grade[1]
+
+                    # Execute the move
+                    controller.game.drop_piece(col)
+                    moves.append(col)
+
+                    # Check if the game has ended
+                    winner = controller.game.check_winner()
+                    if winner:
+                        controller.game.game_over = True
+                        if winner == 1:
+                            agent1_wins += 1
+                        else:
+                            agent2_wins += 1
+                    elif controller.game.is_draw():
+                        controller.game.game_over = True
+                        draws += 1
+                    else:
+                        controller.game.switch_player()
+
+                if recorder is not None:
+                    recorder.write(moves, winner or 0, (agent1_name, agent2_name), seed, worker_id, game_num, timings=timings)
+                if memory_profiler is not None:
+                    memory_profiler.end_game(winner or 0)
+        finally:
+            if recorder is not None:
+                recorder.close()
+            if memory_profiler is not None:
+                memory_profiler.stop_sampler()  # The profiler itself stays open for the caller
+            if search_profiler is not None:
+                search_profiler.close()  # Stops its sampling timer; the samples are kept
 
         # Summarize results
         self.results.append({
+            "seed": seed,
             "agent1": agent1_name,
             "agent2": agent2_name,
             "agent1_wins": agent1_wins,
@@ -87,6 +161,10 @@ class AlgorithmTester:
             "agent2_avg_execution_time": sum(metrics["agent2_execution_time"]) / len(metrics["agent2_execution_time"]),
             "agent1_avg_memory_usage": sum(metrics["agent1_memory_usage"]) / len(metrics["agent1_memory_usage"]),
             "agent2_avg_memory_usage": sum(metrics["agent2_memory_usage"]) / len(metrics["agent2_memory_usage"]),
+            "agent1_graded_moves": metrics["agent1_graded_moves"],
+            "agent2_graded_moves": metrics["agent2_graded_moves"],
+            "agent1_optimal_moves": metrics["agent1_optimal_moves"],
+            "agent2_optimal_moves": metrics["agent2_optimal_moves"],
         })
 
     def print_results(self):
@@ -100,9 +178,13 @@ class AlgorithmTester:
             print(f"  {result['agent2']} Avg Time: {result['agent2_avg_execution_time']:.6f} sec")
             print(f"  {result['agent1']} Avg Memory: {result['agent1_avg_memory_usage']:.6f} MB")
             print(f"  {result['agent2']} Avg Memory: {result['agent2_avg_memory_usage']:.6f} MB")
+            for agent in ("agent1", "agent2"):
+                if result[f"{agent}_graded_moves"]:
+                    rate = result[f"{agent}_optimal_moves"] / result[f"{agent}_graded_moves"] * 100
+                    print(f"  {result[agent]} Optimal Moves: {rate:.2f}% of {result[f'{agent}_graded_moves']} graded")
 
 
 if __name__ == "__main__":
     tester = AlgorithmTester()
-    tester.test_algorithms(num_games=1000)  # Run 10 games for testing
+    tester.test_algorithms(num_games=1000, seed=2024)  # Run 10 games for testing
     tester.print_results()
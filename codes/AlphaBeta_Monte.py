@@ -1,13 +1,18 @@
 import numpy as np
-import random
 from Environment import Connect4
 from BoardHeuristic import BoardHeuristicAI
+from Utility import make_rng
 
 
 class MinimaxAI:
-    def __init__(self, depth):
-        """Initialize the Minimax AI with a given search depth."""
+    def __init__(self, depth, rng=None):
+        """
+        Initialize the Minimax AI with a given search depth.
+        :param depth: Depth of the search tree
+        :param rng: Seed or numpy Generator used for tie-breaking
+        """
         self.depth = depth
+        self.rng = make_rng(rng)
         self.heuristic = BoardHeuristicAI()
 
     def minimax(self, game, depth, maximizing_player):
@@ -36,7 +41,7 @@ class MinimaxAI:
                     best_columns = [col]  # Reset and track the new best column
                 elif new_score == value:
                     best_columns.append(col)  # Add to the list of best columns
-            best_col = random.choice(best_columns)  # Randomly choose among the best columns
+            best_col = best_columns[self.rng.integers(len(best_columns))]  # Randomly choose among the best columns
             return best_col, value
         else:
             value = float('inf')
@@ -51,7 +56,7 @@ class MinimaxAI:
                     best_columns = [col]  # Reset and track the new best column
                 elif new_score == value:
                     best_columns.append(col)  # Add to the list of best columns
-            best_col = random.choice(best_columns)  # Randomly choose among the best columns
+            best_col = best_columns[self.rng.integers(len(best_columns))]  # Randomly choose among the best columns
             return best_col, value
 
 
@@ -102,9 +107,14 @@ class MinimaxAI:
         return best_col
     
 class MinimaxAIWithPruning:
-    def __init__(self, depth):
-        """Initialize the Minimax AI with a given search depth."""
+    def __init__(self, depth, rng=None):
+        """
+        Initialize the Minimax AI with a given search depth.
+        :param depth: Depth of the search tree
+        :param rng: Seed or numpy Generator used for tie-breaking
+        """
         self.depth = depth
+        self.rng = make_rng(rng)
         self.heuristic = BoardHeuristicAI()
 
     def minimax_with_pruning(self, game, depth, alpha, beta, maximizing_player):
@@ -144,7 +154,7 @@ class MinimaxAIWithPruning:
                 alpha = max(alpha, value)
                 if alpha >= beta:
                     break  # Beta cutoff
-            best_col = random.choice(best_columns)  # Randomly choose among the best columns
+            best_col = best_columns[self.rng.integers(len(best_columns))]  # Randomly choose among the best columns
             return best_col, value
         else:
             value = float('inf')
@@ -162,7 +172,7 @@ class MinimaxAIWithPruning:
                 beta = min(beta, value)
                 if alpha >= beta:
                     break  # Alpha cutoff
-            best_col = random.choice(best_columns)  # Randomly choose among the best columns
+            best_col = best_columns[self.rng.integers(len(best_columns))]  # Randomly choose among the best columns
             return best_col, value
 
     def evaluate_board(self, game):
@@ -214,7 +224,6 @@ class MinimaxAIWithPruning:
 
     
 import numpy as np
-import random
 import time
 
 # Assuming all the previous code is already defined for Connect4, MCTS, Minimax with Pruning, etc.
@@ -262,9 +271,10 @@ class Game:
 
 
 class MCTS:
-    def __init__(self, simulations=500):
+    def __init__(self, simulations=500, rng=None):
         self.game = None  # Initially, no game
         self.simulations = simulations
+        self.rng = make_rng(rng)
 
     def set_game(self, game):
         """Set the game state for the MCTS agent."""
@@ -278,7 +288,7 @@ class MCTS:
             valid_columns = [c for c in range(self.game.columns) if self.is_valid_location(board_copy, c)]
             if not valid_columns:
                 return 0  # Draw
-            col = random.choice(valid_columns)
+            col = valid_columns[self.rng.integers(len(valid_columns))]
             row = self.get_next_open_row(board_copy, col)
             board_copy[row][col] = current_player
             if self.check_winner(board_copy, current_player):
@@ -300,7 +310,7 @@ class MCTS:
 
     def is_valid_location(self, board, col):
         """Check if the column has at least one open slot."""
-        return board[5][col] == 0
+        return board[-1][col] == 0  # Top row
 
     def get_next_open_row(self, board, col):
         """Find the next open row in the specified column."""
@@ -0,0 +1,143 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+from Bitboard import WIDTH, HEIGHT, Position
+from Environment import Connect4
+from SelfPlay import AGENT_TYPES, make_agent, parse_agent_spec
+from Utility import game_seed, request_move, seed_agents
+
+
+def parse_position(text):
+    """
+    Parse one position of the input.
+    Two notations are accepted: a move sequence such as "4453" (1-based columns, as in Bitboard.Position.from_moves),
+    or a board encoding of WIDTH * HEIGHT digits 0/1/2 listed from the top row down, as print_board shows it
+    (separators such as "/" or spaces are ignored). The player to move follows from the disc counts.
+    The start position is the empty move sequence, also written "-" (analyze skips blank lines).
+    :return: Connect4 game instance
+    :raises ValueError: If the text is neither notation, or the game is already over
+    """
+    digits = "".join(char for char in text if char.isdigit())
+    if len(digits) == WIDTH * HEIGHT and set(digits) <= set("012"):
+        board = np.flip(np.array([int(char) for char in digits]).reshape(HEIGHT, WIDTH), 0)
+        ones, twos = np.count_nonzero(board == 1), np.count_nonzero(board == 2)
+        if ones - twos not in (0, 1):
+            raise ValueError("Impossible disc counts.")
+        current_player = 1 if ones == twos else 2
+        if np.any((board[1:] != 0) & (board[:-1] == 0)):
+            raise ValueError("Floating disc.")
+    elif text.isdigit() or text.strip() in ("", "-"):
+        board, current_player = Position.from_moves(text.strip(" -")).to_board()
+    else:
+        raise ValueError("Neither a move sequence nor a board encoding.")
+
+    game = Connect4()
+    game.board = board
+    game.current_player = current_player
+    if game.is_draw():
+        raise ValueError("The board is full.")
+    for player in (1, 2):  # check_winner only looks at the current player's discs
+        game.current_player = player
+        if game.check_winner():
+            raise ValueError("The game is already won.")
+    game.current_player = current_player
+    return game
+
+
+def score_fields(value):
+    """
+    JSON fields of a search value for the side to move. JSON has no infinity, so a proven win or loss (+-inf)
+    becomes {"score": None, "proven": "win"} or {"score": None, "proven": "loss"}; a missing value gives
+    {"score": None}.
+    """
+    if value is None or math.isnan(value):
+        return {"score": None}
+    if math.isinf(value):
+        return {"score": None, "proven": "win" if value > 0 else "loss"}
+    return {"score": float(value)}
+
+
+_AGENT = None  # Agent of the current worker process
+
+
+def _init_worker(spec):
+    """Pool initializer: build the agent once per process."""
+    global _AGENT
+    _AGENT = make_agent(spec)
+
+
+def analyze_line(job):
+    """
+    Worker entry point: analyze one input line.
+    :param job: (line index, line text, seed)
+    :return: Dict with the best move (0-based column), score for the side to move (see score_fields), nodes and
+        time, or an error
+    """
+    index, text, seed = job
+    result = {"line": index + 1, "input": text}
+    try:
+        game = parse_position(text)
+    except ValueError as error:
+        result["error"] = str(error)
+        return result
+
+    seed_agents([_AGENT], game_seed(seed, index))
+    start_time = time.perf_counter()
+    col = request_move(_AGENT, game)
+    stats = getattr(_AGENT, "stats", {})
+    result["best_move"] = int(col)
+    result.update(score_fields(stats.get("value")))
+    result.update({"nodes": stats.get("nodes"), "time": time.perf_counter() - start_time})
+    return result
+
+
+def analyze(lines, spec="pruning:4", workers=1, seed=None, output=sys.stdout):
+    """
+    Analyze a stream of positions and write one JSON line per input line, in input order.
+    :param lines: Iterable of position texts (see parse_position); blank lines and "#" comments are skipped
+    :param spec: Agent and budget, e.g. "pruning:6", "mcts:500" or "solver" (see SelfPlay.make_agent)
+    :param workers: Number of worker processes
+    :param seed: Seed of the agents' randomness; line i always gets the same seed
+    :param output: Text stream the JSON lines are written to
+    :return: Number of positions analyzed
+    """
+    parse_agent_spec(spec)  # Fail early on a bad specification, without building the agent
+    jobs = ((index, text, seed) for index, text in enumerate(line.strip() for line in lines)
+            if text and not text.startswith("#"))
+    count = 0
+    if workers > 1:
+        with Pool(workers, initializer=_init_worker, initargs=(spec,)) as pool:
+            results = pool.imap(analyze_line, jobs, chunksize=8)
+            for result in results:
+                output.write(json.dumps(result, allow_nan=False) + "\n")
+                output.flush()
+                count += 1
+    else:
+        _init_worker(spec)
+        for job in jobs:
+            output.write(json.dumps(analyze_line(job), allow_nan=False) + "\n")
+            output.flush()
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze Connect-4 positions in bulk, one JSON line per position.")
+    parser.add_argument("input", nargs="?", default="-", help="File of positions, one per line ('-' for stdin)")
+    parser.add_argument("--agent", default="pruning:4",
+                        help=f"Agent and budget, e.g. pruning:6 or mcts:500 ({', '.join(AGENT_TYPES)})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of processes")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the agents' randomness")
+    args = parser.parse_args()
+
+    if args.input == "-":
+        analyze(sys.stdin, args.agent, args.workers, args.seed)
+    else:
+        with open(args.input) as f:
+            analyze(f, args.agent, args.workers, args.seed)
@@ -0,0 +1,299 @@
+import numpy as np
+from functools import lru_cache
+from Constants import ROWS, COLUMNS
+
+# Bitboard layout: every column uses height + 1 bits, bit (col * (height + 1) + row) is cell (row, col),
+# with row 0 at the bottom as in Connect4.board. The spare top bit of each column stays empty.
+# A layout is generated for each board size; the module-level names below belong to the standard board.
+
+
+class BitboardLayout:
+    """
+    Masks and bit operations of one board size.
+    The operations are closures over the size's constants, so they run as fast as plain module functions.
+    """
+
+    def __init__(self, width, height):
+        """
+        :param width: Number of columns
+        :param height: Number of rows
+        """
+        h1 = height + 1
+        bottom_mask = sum(1 << (col * h1) for col in range(width))
+        board_mask = bottom_mask * ((1 << height) - 1)
+        column_bits = (1 << h1) - 1
+
+        self.width = width
+        self.height = height
+        self.h1 = h1
+        self.cells = width * height
+        self.key_bits = width * h1  # Position keys fit in this many bits
+        self.bottom_mask = bottom_mask
+        self.board_mask = board_mask
+        self.center_order = sorted(range(width), key=lambda col: abs(width // 2 - col))  # Center columns first
+        self.Position = None  # Position class of this size, set by board_layout
+
+        def bottom_mask_col(col):
+            """Bit of the bottom cell of a column."""
+            return 1 << (col * h1)
+
+        def top_mask_col(col):
+            """Bit of the top cell of a column."""
+            return 1 << (height - 1 + col * h1)
+
+        def column_mask(col):
+            """Bits of all cells of a column."""
+            return ((1 << height) - 1) << (col * h1)
+
+        def cell_bit(row, col):
+            """Bit of cell (row, col)."""
+            return 1 << (col * h1 + row)
+
+        def mirror(bitmap):
+            """Mirror a bitmap (or a position key) left to right."""
+            mirrored = 0
+            for col in range(width):
+                mirrored |= ((bitmap >> (col * h1)) & column_bits) << ((width - 1 - col) * h1)
+            return mirrored
+
+        def alignment(position):
+            """Check whether a bitmap of discs contains four in a row."""
+            # Horizontal
+            m = position & (position >> h1)
+            if m & (m >> (2 * h1)):
+                return True
+            # Diagonal 1
+            m = position & (position >> height)
+            if m & (m >> (2 * height)):
+                return True
+            # Diagonal 2
+            m = position & (position >> (height + 2))
+            if m & (m >> (2 * (height + 2))):
+                return True
+            # Vertical
+            m = position & (position >> 1)
+            if m & (m >> 2):
+                return True
+            return False
+
+        def winning_positions(position, mask):
+            """
+            Empty cells that would complete four in a row for the owner of `position`.
+            :param position: Bitmap of one player's discs
+            :param mask: Bitmap of all discs
+            :return: Bitmap of winning cells (playable or not)
+            """
+            # Vertical
+            r = (position << 1) & (position << 2) & (position << 3)
+
+            for shift in (h1, height, height + 2):  # Horizontal and both diagonals
+                p = (position << shift) & (position << 2 * shift)
+                r |= p & (position << 3 * shift)
+                r |= p & (position >> shift)
+                p = (position >> shift) & (position >> 2 * shift)
+                r |= p & (position << shift)
+                r |= p & (position >> 3 * shift)
+
+            return r & (board_mask ^ mask)
+
+        def board_bitmaps(board):
+            """
+            Convert a Connect4 board array of this size to bitmaps.
+            :return: List [mask of all discs, player 1's discs, player 2's discs]
+            """
+            bitmaps = [0, 0, 0]
+            for (row, col), cell in zip(((r, c) for r in range(height) for c in range(width)), board.flat):
+                if cell:
+                    bit = 1 << (col * h1 + row)
+                    bitmaps[0] |= bit
+                    bitmaps[cell] |= bit
+            return bitmaps
+
+        def bit_column(bit):
+            """Column of a single-bit bitmap."""
+            return (bit.bit_length() - 1) // h1
+
+        self.bottom_mask_col = bottom_mask_col
+        self.top_mask_col = top_mask_col
+        self.column_mask = column_mask
+        self.cell_bit = cell_bit
+        self.mirror = mirror
+        self.alignment = alignment
+        self.winning_positions = winning_positions
+        self.board_bitmaps = board_bitmaps
+        self.bit_column = bit_column
+
+    def __reduce__(self):
+        # The closures cannot be pickled: rebuild (or reuse) the layout of the size instead
+        return board_layout, (self.width, self.height)
+
+
+class Position:
+    """
+    Connect-4 position stored as two bitmaps, relative to the player to move.
+    This class plays on the standard board; board_layout(width, height).Position plays on other sizes.
+    """
+
+    layout = None  # BitboardLayout of the board size, set below
+
+    def __init__(self, current_position=0, mask=0, moves=0):
+        """
+        :param current_position: Bitmap of the discs of the player to move
+        :param mask: Bitmap of all discs
+        :param moves: Number of discs played so far
+        """
+        self.current_position = current_position
+        self.mask = mask
+        self.moves = moves
+
+    @classmethod
+    def from_board(cls, board, current_player):
+        """
+        Build a position from a Connect4 board array, of any size.
+        :param board: Board array with row 0 at the bottom
+        :param current_player: Player to move (1 or 2)
+        :return: Position of the board's size
+        """
+        rows, columns = board.shape
+        layout = cls.layout if (columns, rows) == (cls.layout.width, cls.layout.height) else board_layout(columns, rows)
+        cell_bit = layout.cell_bit
+        current_position = mask = moves = 0
+        for (row, col), cell in zip(((r, c) for r in range(rows) for c in range(columns)), board.flat):
+            if cell:
+                bit = cell_bit(row, col)
+                mask |= bit
+                moves += 1
+                if cell == current_player:
+                    current_position |= bit
+        return layout.Position(current_position, mask, moves)
+
+    @classmethod
+    def from_moves(cls, moves):
+        """
+        Build a position from a move sequence such as "4453" (1-based columns).
+        :raises ValueError: If a move is out of range, in a full column, or after a win
+        """
+        position = cls()
+        for char in moves.strip():
+            col = int(char) - 1
+            if not 0 <= col < cls.layout.width or not position.can_play(col):
+                raise ValueError(f"Invalid move sequence: {moves}")
+            if position.is_winning_move(col):
+                raise ValueError(f"Move sequence continues after a win: {moves}")
+            position.play_col(col)
+        return position
+
+    def copy(self):
+        """Return an independent copy of the position."""
+        return self.__class__(self.current_position, self.mask, self.moves)
+
+    def to_board(self):
+        """Convert back to a Connect4 board array; returns (board, current_player)."""
+        layout = self.layout
+        current_player = 1 if self.moves % 2 == 0 else 2
+        board = np.zeros((layout.height, layout.width), dtype=int)
+        for row in range(layout.height):
+            for col in range(layout.width):
+                bit = layout.cell_bit(row, col)
+                if self.mask & bit:
+                    board[row][col] = current_player if self.current_position & bit else 3 - current_player
+        return board, current_player
+
+    def can_play(self, col):
+        """Check if the column has at least one open slot."""
+        return (self.mask & self.layout.top_mask_col(col)) == 0
+
+    def play(self, move):
+        """Play a move given as the bitmap of the cell it fills."""
+        self.current_position ^= self.mask
+        self.mask |= move
+        self.moves += 1
+
+    def play_col(self, col):
+        """Drop a disc of the player to move into a column."""
+        self.play((self.mask + self.layout.bottom_mask_col(col)) & self.layout.column_mask(col))
+
+    def is_winning_move(self, col):
+        """Check if dropping into the column wins for the player to move."""
+        return bool(self.winning_position() & self.possible() & self.layout.column_mask(col))
+
+    def possible(self):
+        """Bitmap of the cells that can be played next."""
+        layout = self.layout
+        return (self.mask + layout.bottom_mask) & layout.board_mask
+
+    def winning_position(self):
+        """Empty cells completing four for the player to move."""
+        return self.layout.winning_positions(self.current_position, self.mask)
+
+    def opponent_winning_position(self):
+        """Empty cells completing four for the opponent."""
+        return self.layout.winning_positions(self.current_position ^ self.mask, self.mask)
+
+    def can_win_next(self):
+        """Check if the player to move has an immediate win."""
+        return bool(self.winning_position() & self.possible())
+
+    def key(self):
+        """Unique key of the position (fits in layout.key_bits bits)."""
+        return self.current_position + self.mask
+
+    def mirror_key(self):
+        """Key of the left-right mirrored position."""
+        return self.layout.mirror(self.current_position + self.mask)
+
+    def canonical_key(self):
+        """Key shared by a position and its mirror image."""
+        key = self.current_position + self.mask
+        return min(key, self.layout.mirror(key))
+
+    def is_symmetric(self):
+        """Check if the position is its own mirror image."""
+        key = self.current_position + self.mask
+        return key == self.layout.mirror(key)
+
+    def __reduce__(self):
+        # Position classes of other sizes are built at runtime: pickle them by size
+        return _make_position, (self.layout.width, self.layout.height, self.current_position, self.mask, self.moves)
+
+
+@lru_cache(maxsize=None)
+def board_layout(width=COLUMNS, height=ROWS):
+    """
+    Bitboard layout of a board size, built once per size along with its Position class.
+    :param width: Number of columns
+    :param height: Number of rows
+    :return: BitboardLayout
+    """
+    layout = BitboardLayout(width, height)
+    if (width, height) == (COLUMNS, ROWS):
+        layout.Position = Position
+    else:
+        layout.Position = type("Position", (Position,), {"layout": layout, "__qualname__": f"Position{width}x{height}"})
+    return layout
+
+
+def _make_position(width, height, current_position, mask, moves):
+    """Unpickle a Position of any size."""
+    return board_layout(width, height).Position(current_position, mask, moves)
+
+
+STANDARD = Position.layout = board_layout(COLUMNS, ROWS)
+
+WIDTH = STANDARD.width
+HEIGHT = STANDARD.height
+H1 = STANDARD.h1
+
+BOTTOM_MASK = STANDARD.bottom_mask
+BOARD_MASK = STANDARD.board_mask
+CENTER_ORDER = STANDARD.center_order
+
+bottom_mask_col = STANDARD.bottom_mask_col
+top_mask_col = STANDARD.top_mask_col
+column_mask = STANDARD.column_mask
+cell_bit = STANDARD.cell_bit
+mirror = STANDARD.mirror
+alignment = STANDARD.alignment
+winning_positions = STANDARD.winning_positions
+board_bitmaps = STANDARD.board_bitmaps
+bit_column = STANDARD.bit_column
@@ -1,33 +1,98 @@
 import numpy as np
+from Constants import ROWS, COLUMNS
+from HeuristicWeights import load_weights
+from Utility import make_rng
+from WindowTables import window_counts
 
 class BoardHeuristicAI:
-    def __init__(self):
-        """Initialize the heuristic matrix for evaluating moves."""
-        self.heuristic_matrix = np.array([
-            [3, 4, 5, 7, 5, 4, 3],
-            [4, 6, 8, 10, 8, 6, 4],
-            [5, 8, 11, 13, 11, 8, 5],
-            [5, 8, 11, 13, 11, 8, 5],
-            [4, 6, 8, 10, 8, 6, 4],
-            [3, 4, 5, 7, 5, 4, 3]
-        ])
+    def __init__(self, rng=None, weights=None, rows=ROWS, columns=COLUMNS):
+        """
+        Initialize the heuristic matrix for evaluating moves.
+        :param rng: Seed or numpy Generator used for tie-breaking
+        :param weights: Tuned weights holding a "heuristic_matrix", a weight file or dict (see HeuristicWeights)
+        :param rows: Number of board rows; boards of other sizes rebuild the tables when they are first scored
+        :param columns: Number of board columns
+        """
+        self.rng = make_rng(rng)
+        self.tuned_matrix = load_weights(weights).get("heuristic_matrix")
+        self.resize(rows, columns)
+
+    def resize(self, rows, columns):
+        """
+        Set the heuristic matrix for a board size: the tuned matrix when it has that size, otherwise
+        the number of four-cell windows through every cell (the classic 6x7 table on the standard board).
+        """
+        if self.tuned_matrix is not None and np.shape(self.tuned_matrix) == (rows, columns):
+            self.heuristic_matrix = np.array(self.tuned_matrix)
+        else:
+            self.heuristic_matrix = np.array(window_counts(rows, columns))
+        self.build_tables()
+
+    def fit(self, shape):
+        """Make sure the tables match a board shape (rows, columns)."""
+        if shape != self.heuristic_matrix.shape:
+            self.resize(*shape)
+
+    def build_tables(self):
+        """
+        Precompute the lookup tables derived from the heuristic matrix.
+        move_table[h][c] is the score of dropping a disc into column c when it holds h discs;
+        the extra last row marks full columns with -inf.
+        """
+        rows, columns = self.heuristic_matrix.shape
+        self.move_table = np.vstack([self.heuristic_matrix.astype(float), np.full(columns, float('-inf'))])
+        self.move_table_rows = self.move_table.tolist()  # Plain lists for fast scalar lookups
+        self.column_indices = np.arange(columns)
+
+    def column_heights(self, board):
+        """Number of discs in every column of a board (or of a stack of boards)."""
+        return np.count_nonzero(board, axis=-2)
 
     def evaluate_move(self, game, col):
         """
         Evaluate the heuristic score of a move for the current player.
         :param game: Connect4 game instance
         :param col: Column index for evaluation
-        :return: Heuristic score for the move
+        :return: Heuristic score for the move, -inf for a full column
+        """
+        self.fit(game.board.shape)
+        return self.move_table_rows[np.count_nonzero(game.board[:, col])][col]
+
+    def move_scores(self, heights):
+        """
+        Score every column straight from the column heights, without touching a board.
+        :param heights: Discs per column, shape (columns,) or (N, columns)
+        :return: Scores of the same shape, -inf for full columns
+        """
+        return self.move_table[heights, self.column_indices]
+
+    def score_moves(self, game):
+        """
+        Score every column of one position in a single vectorized call.
+        :param game: Connect4 game instance
+        :return: Array with one score per column, -inf for full columns
+        """
+        self.fit(game.board.shape)
+        return self.move_scores(self.column_heights(game.board))
+
+    def score_positions(self, boards):
+        """
+        Score every move of many positions at once.
+        :param boards: Array of shape (N, rows, columns)
+        :return: Array of shape (N, columns), -inf for full columns
         """
-        if not game.is_valid_location(col):
-            return float('-inf')  # Invalid moves should not be considered
+        boards = np.asarray(boards)
+        self.fit(boards.shape[1:])
+        return self.move_scores(self.column_heights(boards))
 
-        # Simulate dropping the piece
-        row = game.get_next_open_row(col)
-        game.board[row][col] = game.current_player
-        score = self.heuristic_matrix[row][col]
-        game.board[row][col] = 0  # Undo the move
-        return score
+    def positional_score(self, board):
+        """
+        Whole-position score: heuristic values of player 1's discs minus player 2's.
+        :param board: Board array
+        :return: Positional score from player 1's point of view
+        """
+        self.fit(board.shape)
+        return int((self.heuristic_matrix * ((board == 1).astype(int) - (board == 2))).sum())
 
     def get_best_move(self, game):
         """
@@ -35,8 +100,46 @@ class BoardHeuristicAI:
         :param game: Connect4 game instance
         :return: Column index of the best move
         """
+        scores = self.score_moves(game)
         valid_columns = [c for c in range(game.columns) if game.is_valid_location(c)]
-        scores = [self.evaluate_move(game, c) for c in valid_columns]
-        best_score = max(scores)
-        best_columns = [valid_columns[i] for i in range(len(scores)) if scores[i] == best_score]
-        return np.random.choice(best_columns)  # Break ties randomly
+        best_score = max(scores[c] for c in valid_columns)
+        best_columns = [c for c in valid_columns if scores[c] == best_score]
+        return best_columns[self.rng.integers(len(best_columns))]  # Break ties randomly
+
+
+class PositionalScore:
+    """Positional score of a position, maintained incrementally as discs are dropped."""
+
+    def __init__(self, heuristic, board=None):
+        """
+        :param heuristic: BoardHeuristicAI whose tables are used
+        :param board: Optional starting board; defaults to an empty one of the heuristic's size
+        """
+        if board is None:
+            self.heights = [0] * heuristic.heuristic_matrix.shape[1]
+            self.score = 0
+        else:
+            self.score = heuristic.positional_score(board)  # Fits the tables to the board first
+            self.heights = heuristic.column_heights(board).tolist()
+        self.table = heuristic.move_table_rows
+
+    def drop(self, col, player):
+        """
+        Account for a disc dropped into a column.
+        :return: Row the disc landed in
+        """
+        row = self.heights[col]
+        self.heights[col] = row + 1
+        self.score += self.table[row][col] if player == 1 else -self.table[row][col]
+        return row
+
+    def undo(self, col, player):
+        """Remove the top disc of a column, previously dropped by player."""
+        row = self.heights[col] - 1
+        self.heights[col] = row
+        self.score -= self.table[row][col] if player == 1 else -self.table[row][col]
+        return row
+
+    def move_score(self, col):
+        """Score of dropping into a column right now (-inf when it is full)."""
+        return self.table[self.heights[col]][col]
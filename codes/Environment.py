@@ -1,10 +1,15 @@
 import numpy as np
+from Constants import ROWS, COLUMNS
 
 class Connect4:
-    def __init__(self):
-        """Initialize the Connect-4 board and game state."""
-        self.rows = 6
-        self.columns = 7
+    def __init__(self, rows=ROWS, columns=COLUMNS):
+        """
+        Initialize the Connect-4 board and game state.
+        :param rows: Number of rows
+        :param columns: Number of columns
+        """
+        self.rows = rows
+        self.columns = columns
         self.board = np.zeros((self.rows, self.columns), dtype=int)
         self.game_over = False
         self.current_player = 1  # Player 1 starts
@@ -13,7 +18,7 @@ class Connect4:
 
     def is_valid_location(self, col):
         """Check if the column has at least one open slot."""
-        return self.board[5][col] == 0
+        return self.board[-1][col] == 0  # Top row
 
     def drop_piece(self, col):
         """
@@ -33,7 +38,7 @@ class Connect4:
         Find the next open row in the specified column.
         Returns the row index for the lowest available slot.
         """
-        for r in range(0, 6, 1):  # Start from the bottom row
+        for r in range(self.rows):  # Start from the bottom row
             if self.board[r][col] == 0:
                 return r
         raise ValueError("Column is full.")
@@ -104,9 +109,9 @@ def play_game():
 
         try:
             if game.current_player == 1:  # Player 1 (manual input)
-                col = int(input(f"Player {game.current_player}, choose a column (0-6): "))
+                col = int(input(f"Player {game.current_player}, choose a column (0-{game.columns - 1}): "))
                 if col < 0 or col >= game.columns:
-                    print("Invalid column. Choose between 0 and 6.")
+                    print(f"Invalid column. Choose between 0 and {game.columns - 1}.")
                     continue
             else:  # Player 2 (random move)
                 valid_columns = [c for c in range(game.columns) if game.is_valid_location(c)]
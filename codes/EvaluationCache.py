@@ -0,0 +1,104 @@
+import sys
+from collections import OrderedDict
+
+from Bitboard import Position
+
+ENTRY_OVERHEAD = 100  # Bytes of an OrderedDict entry beyond its key and value (hash slot and link node)
+
+
+def board_key(board, player=1):
+    """
+    Cache key of a board array: its size and the Bitboard key of the position with `player`'s discs as the mover's,
+    shared by the board and its mirror image. Only evaluations that are the same on mirrored boards may use it.
+    """
+    return board.shape, Position.from_board(board, player).canonical_key()
+
+
+def entry_size(key, value):
+    """Approximate bytes taken by a cache entry, from sys.getsizeof of its key (and key parts) and value."""
+    size = ENTRY_OVERHEAD + sys.getsizeof(key) + sys.getsizeof(value)
+    if isinstance(key, tuple):
+        size += sum(sys.getsizeof(part) for part in key)
+    return size
+
+
+class EvaluationCache:
+    """
+    Bounded cache of position evaluations, shared by any number of agents and games.
+    Keys hold the evaluator (with its weights) and a board_key, so agents with different evaluations or weights
+    can share one cache and mirrored positions share an entry; the least recently used entries are evicted once
+    either cap is reached. Entry sizes are estimated with entry_size (a minimax leaf entry takes about 250 bytes).
+    """
+
+    def __init__(self, max_entries=250_000, max_bytes=None):
+        """
+        :param max_entries: Entries kept at most
+        :param max_bytes: Approximate memory kept at most (entry_size summed over the entries), or None for no cap
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0  # entry_size of every entry, summed
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value of a key, or None when it is missing."""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a value, evicting least recently used entries while the cache is over a cap."""
+        if key in self.entries:
+            self.bytes -= entry_size(key, self.entries[key])
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self.bytes += entry_size(key, value)
+        while len(self.entries) > self.max_entries or \
+                (self.max_bytes is not None and self.bytes > self.max_bytes and len(self.entries) > 1):
+            self.bytes -= entry_size(*self.entries.popitem(last=False))
+            self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value of a key, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def memory_usage(self):
+        """Approximate size: the tracked entry sizes (see MemoryProfile)."""
+        return {"evaluation_cache": {"bytes": sys.getsizeof(self.entries) + self.bytes, "entries": len(self.entries)}}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getstate__(self):
+        # Worker processes get an empty cache with the same cap rather than a copy of the entries
+        return {"max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_entries"], state.get("max_bytes"))
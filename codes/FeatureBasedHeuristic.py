@@ -1,98 +1,186 @@
-from Environment import Connect4  # Import the Connect4 class
 import numpy as np
+from Bitboard import Position
+from EvaluationCache import board_key
+from HeuristicWeights import load_weights
+from Utility import make_rng
+from WindowTables import gather_windows
 
 class FeatureBasedHeuristicAgent:
-    def __init__(self):
+    def __init__(self, rng=None, weights=None, cache=None):
+        """
+        :param rng: Seed or numpy Generator for the evaluation noise and tie-breaking
+        :param weights: Tuned weights holding "feature_weights", a weight file or dict (see HeuristicWeights)
+        :param cache: Optional EvaluationCache for the noise-free evaluations, which can be shared with other agents
+        """
+        self.rng = make_rng(rng)
         self.feature_weights = {
             "win": float('inf'),
             "three_with_two_options": 900_000,
             "three_with_one_option": [40_000, 30_000, 20_000, 10_000],  # Depends on direction
             "unconnected": [40, 70, 120, 200, 120, 70, 40],  # Central column favored
         }
+        self.feature_weights.update(load_weights(weights).get("feature_weights", {}))
+        self.cache = cache
 
     def evaluate(self, game):
         """Feature-Based Heuristic Evaluation with randomness."""
-        board = game.board
-        score = 0
+        return self.evaluate_boards(game.board[np.newaxis], [game.current_player])[0]
+
+    def evaluate_boards(self, boards, players, noise=True):
+        """
+        Evaluate a stack of positions in one vectorized call.
+        :param boards: Array of shape (N, rows, columns)
+        :param players: Player to evaluate for in each position, length N
+        :param noise: Add the random variation; without it the agent's generator is left untouched
+        :return: Array of N scores (inf for positions the player has won)
+        """
+        players = np.asarray(players)
+        if self.cache is None:
+            scores = self.feature_scores(boards, players)
+        else:
+            scores = self.cached_feature_scores(boards, players)
+
+        # Add randomness to prevent repetitive behavior
+        if noise:
+            scores += self.rng.uniform(-500, 500, size=len(scores))  # Add larger random variation
+        return scores
 
+    def feature_scores(self, boards, players):
+        """Noise-free part of evaluate_boards."""
         # Feature 1: Check for winning state
-        if game.check_winner() == game.current_player:
-            return self.feature_weights["win"]
+        won, threes_two_options, threes_one_option = self.batch_window_features(boards, players)
 
         # Feature 2: Check for three connected with two options
-        score += self.evaluate_threes(board, game.current_player, with_two_options=True)
+        scores = threes_two_options * float(self.feature_weights["three_with_two_options"])
 
         # Feature 3: Check for three connected with one option
-        score += self.evaluate_threes(board, game.current_player, with_two_options=False)
+        scores += threes_one_option * self.feature_weights["three_with_one_option"][0]
 
         # Feature 4: Evaluate unconnected discs (favor central column)
-        score += self.evaluate_unconnected(board)
-
-        # Add randomness to prevent repetitive behavior
-        score += np.random.uniform(-500, 500)  # Add larger random variation
-
-        return score
+        scores += self.batch_unconnected(boards)
+
+        scores[won] = self.feature_weights["win"]
+        return scores
+
+    def cached_feature_scores(self, boards, players):
+        """feature_scores through the evaluation cache: only the positions missing from it are evaluated."""
+        namespace = ("feature", repr(self.feature_weights))
+        weights = self.unconnected_weights(boards.shape[2])
+        if np.array_equal(weights, weights[::-1]):  # Mirrored boards score the same: share their entries
+            keys = [(namespace, board_key(board, player), int(player)) for board, player in zip(boards, players)]
+        else:
+            keys = [(namespace, board.shape, Position.from_board(board, player).key(), int(player))
+                    for board, player in zip(boards, players)]
+        scores = np.array([self.cache.get(key) for key in keys], dtype=float)  # Missing entries become nan
+        missing = np.flatnonzero(np.isnan(scores))
+        if len(missing):
+            scores[missing] = self.feature_scores(boards[missing], players[missing])
+            for index in missing:
+                self.cache.put(keys[index], scores[index])
+        return scores
+
+    def memory_usage(self):
+        """Retained state by component (see MemoryProfile)."""
+        return self.cache.memory_usage() if self.cache is not None else {}
+
+    def window_features(self, board, player):
+        """
+        Compute the window features of a board in a single pass over the window table.
+        A three counts when the window starts on one of the player's discs, holds three of
+        them, and has two (resp. one) empty cells left.
+        :param board: Board array
+        :param player: Player whose discs are counted
+        :return: (has four in a row, threes with two options, threes with one option)
+        """
+        won, threes_two_options, threes_one_option = self.batch_window_features(board[np.newaxis], [player])
+        return bool(won[0]), int(threes_two_options[0]), int(threes_one_option[0])
+
+    def batch_window_features(self, boards, players):
+        """Vectorized window_features over a stack of boards; returns three arrays of length N."""
+        windows = gather_windows(boards)
+        own = windows == np.asarray(players).reshape(-1, 1, 1)
+        count = own.sum(axis=2)
+        spaces = (windows == 0).sum(axis=2)
+        threes = own[:, :, 0] & (count == 3)
+        return ((count == 4).any(axis=1),
+                np.count_nonzero(threes & (spaces == 2), axis=1),
+                np.count_nonzero(threes & (spaces == 1), axis=1))
 
     def evaluate_threes(self, board, player, with_two_options):
         """Evaluate sequences of three connected discs."""
-        score = 0
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]  # Horizontal, vertical, diagonals
-
-        for r in range(board.shape[0]):
-            for c in range(board.shape[1]):
-                if board[r][c] == player:
-                    for dr, dc in directions:
-                        count = 0
-                        spaces = 0
-                        for i in range(4):
-                            nr, nc = r + dr * i, c + dc * i
-                            if 0 <= nr < board.shape[0] and 0 <= nc < board.shape[1]:
-                                if board[nr][nc] == player:
-                                    count += 1
-                                elif board[nr][nc] == 0:
-                                    spaces += 1
-                            else:
-                                break
-
-                        if count == 3:
-                            if with_two_options and spaces == 2:
-                                score += self.feature_weights["three_with_two_options"]
-                            elif not with_two_options and spaces == 1:
-                                score += self.feature_weights["three_with_one_option"][spaces - 1]
-
-        return score
+        _, threes_two_options, threes_one_option = self.window_features(board, player)
+        if with_two_options:
+            return threes_two_options * self.feature_weights["three_with_two_options"]
+        return threes_one_option * self.feature_weights["three_with_one_option"][0]
+
+    def unconnected_weights(self, columns):
+        """
+        Per-column weights of the unconnected discs for a board width.
+        The configured profile (one weight per standard column) is stretched over other widths.
+        """
+        weights = self.feature_weights["unconnected"]
+        if len(weights) == columns:
+            return np.asarray(weights, dtype=float)
+        return np.interp(np.linspace(0, len(weights) - 1, columns), np.arange(len(weights)), weights)
 
     def evaluate_unconnected(self, board):
         """Evaluate unconnected discs based on column centrality."""
         score = 0
-        num_columns = len(self.feature_weights["unconnected"])  # Should match the number of columns (7)
+        weights = self.unconnected_weights(board.shape[1])
 
         for c in range(board.shape[1]):  # Iterate over all columns
-            if c >= num_columns:
-                continue  # Prevent IndexError if column index exceeds feature_weights list length
             for r in range(board.shape[0]):  # Iterate over rows
                 if board[r][c] != 0:  # Disc is found
-                    col_score = self.feature_weights["unconnected"][c]
+                    col_score = weights[c]
                     score += col_score
                     break  # Only count the top disc in each column
         return score
 
+    def batch_unconnected(self, boards):
+        """Vectorized evaluate_unconnected over a stack of boards."""
+        occupied = (boards != 0).any(axis=1)  # Columns holding at least one disc
+        return occupied @ self.unconnected_weights(boards.shape[2])
+
+    def score_moves(self, game, noise=True):
+        """
+        Score every column of one position in a single vectorized call.
+        :param game: Connect4 game instance
+        :param noise: Add the random variation (see evaluate_boards)
+        :return: Array with one score per column, -inf for full columns
+        """
+        return self.score_positions(game.board[np.newaxis], [game.current_player], noise)[0]
+
+    def score_positions(self, boards, players, noise=True):
+        """
+        Score every move of many positions at once by stacking all child boards.
+        :param boards: Array of shape (N, rows, columns)
+        :param players: Player to move in each position, length N
+        :param noise: Add the random variation (see evaluate_boards)
+        :return: Array of shape (N, columns), -inf for full columns
+        """
+        boards = np.asarray(boards)
+        players = np.asarray(players)
+        num_positions, rows, columns = boards.shape
+        heights = np.count_nonzero(boards, axis=1)  # Next open row of every column
+        valid = heights < rows
+
+        # One child board per (position, column), with the mover's disc dropped in
+        children = np.repeat(boards[:, np.newaxis], columns, axis=1)
+        position_idx, col_idx = np.nonzero(valid)
+        children[position_idx, col_idx, heights[position_idx, col_idx], col_idx] = players[position_idx]
+
+        scores = np.full((num_positions, columns), float('-inf'))
+        scores[valid] = self.evaluate_boards(children[valid], players[position_idx], noise)
+        return scores
+
     def get_move(self, game):
         """Evaluate each move and choose the best."""
+        scores = self.score_moves(game)
         valid_columns = [col for col in range(game.columns) if game.is_valid_location(col)]
-        scores = []
-
-        for col in valid_columns:
-            temp_game = Connect4()  # Temporary game state for simulation
-            temp_game.board = game.board.copy()
-            temp_game.current_player = game.current_player
-            temp_game.drop_piece(col)
-            score = self.evaluate(temp_game)
-            scores.append((col, score))
 
         # Select column with highest score, with random tiebreaking
-        max_score = max([s[1] for s in scores])
-        best_columns = [col for col, score in scores if score == max_score]
+        max_score = max(scores[col] for col in valid_columns)
+        best_columns = [col for col in valid_columns if scores[col] == max_score]
 
         # Add randomness to the choice if there are ties
-        return np.random.choice(best_columns)
+        return best_columns[self.rng.integers(len(best_columns))]
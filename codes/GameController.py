@@ -1,52 +1,195 @@
+import pickle
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from Constants import ROWS, COLUMNS
 from Environment import Connect4
 from FeatureBasedHeuristic import FeatureBasedHeuristicAgent
 from BoardHeuristic import BoardHeuristicAI
 from GameInterface import GameInterface
+from Utility import request_move
 import pygame
 
 
+SEARCH_STATE = ("rng", "last_value", "stats", "nodes", "book_hits")  # Agent attributes a search moves forward
+
+
+def _ponder_reply(agent, board, current_player, col):
+    """
+    Worker entry point: the reply of `agent` if the player to move drops into `col`.
+    The copy of the agent is closed afterwards: pools and shared tables it started (LazySMP) are not leaked.
+    :return: (column of the reply, the agent after searching it), or None if that move ends the game
+    """
+    game = Connect4(*board.shape)
+    game.board = board
+    game.current_player = current_player
+    game.drop_piece(col)
+    if game.check_winner() or game.is_draw():
+        return None
+    game.switch_player()
+    try:
+        return request_move(agent, game), agent
+    finally:
+        close = getattr(agent, "close", None)
+        if close is not None:
+            close()
+
+
+def adopt_search_state(agent, searched):
+    """
+    Bring an agent up to date with the copy of it that searched a pondered reply: generator, aspiration guess,
+    stats and counters, so that it goes on exactly as if it had searched the move itself. Tables and caches,
+    which the copy does not bring back, only affect speed and are kept.
+    """
+    fallback = getattr(agent, "fallback", None)  # OpeningBookAgent
+    if fallback is not None:
+        adopt_search_state(fallback, searched.fallback)
+    state = vars(searched)
+    for name in SEARCH_STATE:
+        if name in state:
+            setattr(agent, name, state[name])
+
+
 class GameController:
-    def __init__(self, agent_1=None, agent_2=None):
-        self.game = Connect4()
+    def __init__(self, agent_1=None, agent_2=None, ponder=False, ponder_workers=None,
+                 move_delay=1500, result_delay=3000, end_delay=5000, fps=30, show_scores=False,
+                 rows=ROWS, columns=COLUMNS):
+        """
+        :param agent_1: Agent playing as player 1 (defaults to the Feature-Based Heuristic)
+        :param agent_2: Agent playing as player 2 (defaults to the Board-Based Heuristic)
+        :param ponder: Let the waiting agent search its replies to every opponent move in the background.
+            A pondered reply is the move the agent would have found itself, and its generator, stats and counters
+            are carried back, but not what the pondering copy added to tables and caches: agents given an
+            EvaluationCache can play differently (MCTS then pools other playouts). Agents that cannot be pickled
+            are not pondered for
+        :param ponder_workers: Number of pondering processes (defaults to the number of CPUs)
+        :param move_delay: Milliseconds each move stays on screen before the game goes on
+        :param result_delay: Milliseconds the winner is shown
+        :param end_delay: Milliseconds the window stays open after that
+        :param fps: Frame rate of the event loop while waiting
+        :param show_scores: Show the column scores of agents that have score_moves (the heuristic agents);
+            the overlay does not change their moves
+        :param rows: Number of board rows
+        :param columns: Number of board columns
+        """
+        self.game = Connect4(rows, columns)
         self.agent_1 = agent_1 if agent_1 else FeatureBasedHeuristicAgent()
         self.agent_2 = agent_2 if agent_2 else BoardHeuristicAI()
-        self.interface = GameInterface()
+        self.interface = GameInterface(rows, columns)
+        self.ponder_pool = ProcessPoolExecutor(ponder_workers) if ponder else None
+        self.pondered = {}  # Opponent's column -> future of the waiting agent's reply
+        self.ponderable = {}  # id(agent) -> whether the agent can be sent to the pondering processes
+        self.ponder_hits = 0
+        self.move_delay = move_delay
+        self.result_delay = result_delay
+        self.end_delay = end_delay
+        self.fps = fps
+        self.show_scores = show_scores
+
+    def start_pondering(self):
+        """Search the waiting agent's reply to each move the player to move can make."""
+        waiting_agent = self.agent_2 if self.game.current_player == 1 else self.agent_1
+        if not self.can_ponder(waiting_agent):
+            return
+        self.pondered = {
+            col: self.ponder_pool.submit(_ponder_reply, waiting_agent, self.game.board.copy(),
+                                         self.game.current_player, col)
+            for col in range(self.game.columns) if self.game.is_valid_location(col)
+        }
+
+    def can_ponder(self, agent):
+        """Check (once per agent) that an agent can be pickled to the pondering processes."""
+        if id(agent) not in self.ponderable:
+            try:
+                pickle.dumps(agent)
+                self.ponderable[id(agent)] = True
+            except Exception:  # E.g. agents holding locks, sockets or open files
+                self.ponderable[id(agent)] = False
+        return self.ponderable[id(agent)]
+
+    def next_move(self, previous_col=None):
+        """
+        Get the move of the player to move, reusing the pondered reply to the previous move if there is one.
+        :param previous_col: Column the opponent just played, None at the start of the game
+        """
+        agent = self.agent_1 if self.game.current_player == 1 else self.agent_2
+        future = self.pondered.pop(previous_col, None)
+        for other in self.pondered.values():
+            other.cancel()
+        self.pondered = {}
+
+        reply = future.result() if future is not None else None
+        if self.ponder_pool is not None:
+            self.start_pondering()  # The waiting agent thinks on this player's time
+        if reply is not None and self.game.is_valid_location(reply[0]):
+            col, searched = reply
+            adopt_search_state(agent, searched)
+            self.ponder_hits += 1
+        else:
+            col = request_move(agent, self.game)
+        return col
+
+    def next_move_async(self, previous_col=None):
+        """
+        Compute next_move in a background thread, so the window keeps responding during long searches.
+        :return: Future of the column
+        """
+        future = Future()
+
+        def search():
+            try:
+                future.set_result(self.next_move(previous_col))
+            except BaseException as error:
+                future.set_exception(error)
+
+        threading.Thread(target=search, daemon=True).start()  # Daemon: closing the window never waits for it
+        return future
+
+    def overlay_scores(self, agent):
+        """
+        Column scores of the overlay. The feature agent's scores are shown without their random variation:
+        drawing it from the agent's generator would change the agent's next move.
+        """
+        if isinstance(agent, FeatureBasedHeuristicAgent):
+            return agent.score_moves(self.game, noise=False)
+        return agent.score_moves(self.game)
+
+    def close(self, wait=True):
+        """
+        Stop the pondering processes.
+        :param wait: Wait for the searches already running to finish
+        """
+        if self.ponder_pool is not None:
+            self.ponder_pool.shutdown(wait=wait, cancel_futures=True)
+            self.ponder_pool = None
 
     def play_game(self):
         """Play a game between the Feature-Based Heuristic and the Board-Based Heuristic."""
         print("Starting the game between Feature-Based Heuristic and Board-Based Heuristic!")
         self.interface.draw_board(self.game.board)
-        pygame.display.update()
-        running = True
+        clock = pygame.time.Clock()
+        col = None
+        move_future = None  # Search of the player to move, running in the background
+        move_played = False  # A move is on screen and the result still has to be checked
+        resume_at = 0  # Time (pygame ticks) until which the loop only keeps the window alive
 
-        while running:
+        while True:
             for event in pygame.event.get():
-                if event.type == pygame.QUIT:  # Allow window to close
+                if event.type == pygame.QUIT:  # Allow window to close, even during a search
+                    self.close(wait=False)
                     pygame.quit()
                     exit()
 
-            if self.game.game_over:
-                print("Game over!")
-                pygame.time.wait(5000)  # Wait 5 seconds at the end
-                running = False
+            clock.tick(self.fps)
+            now = pygame.time.get_ticks()
+            if now < resume_at:
                 continue
 
-            if self.game.current_player == 1:  # Player 1: Feature-Based Heuristic
-                col = self.agent_1.get_move(self.game)
-                print(f"Player 1 (Feature-Based Heuristic) chooses column {col + 1}")
-            else:  # Player 2: Board-Based Heuristic
-                col = self.agent_2.get_best_move(self.game)
-                print(f"Player 2 (Board-Based Heuristic) chooses column {col + 1}")
-
-            if self.game.is_valid_location(col):
-                self.game.drop_piece(col)
-                print(f"Piece dropped in column {col + 1}")
-                self.interface.draw_board(self.game.board)
-                pygame.display.update()
-
-                # Add delay between moves
-                pygame.time.wait(1500)  # Wait 2 seconds before the next move
+            if self.game.game_over:
+                self.close()
+                return
 
+            if move_played:
+                move_played = False
                 winner = self.game.check_winner()
                 if winner:
                     print(f"Player {winner} wins!")
@@ -58,3 +201,30 @@ class GameController:
                     self.game.game_over = True
                 else:
                     self.game.switch_player()
+                if self.game.game_over:
+                    print("Game over!")
+                    resume_at = now + self.result_delay + self.end_delay
+                continue
+
+            if move_future is None:
+                agent = self.agent_1 if self.game.current_player == 1 else self.agent_2
+                if self.show_scores and hasattr(agent, "score_moves"):
+                    self.interface.draw_scores(self.overlay_scores(agent))
+                move_future = self.next_move_async(col)
+                continue
+            if not move_future.done():
+                continue
+
+            col = move_future.result()
+            move_future = None
+            if self.game.current_player == 1:  # Player 1: Feature-Based Heuristic
+                print(f"Player 1 (Feature-Based Heuristic) chooses column {col + 1}")
+            else:  # Player 2: Board-Based Heuristic
+                print(f"Player 2 (Board-Based Heuristic) chooses column {col + 1}")
+
+            if self.game.is_valid_location(col):
+                self.game.drop_piece(col)
+                print(f"Piece dropped in column {col + 1}")
+                self.interface.draw_board(self.game.board)
+                move_played = True
+                resume_at = now + self.move_delay  # Show the move before the game goes on
@@ -1,10 +1,17 @@
 import pygame
 import numpy as np
+from Constants import ROWS, COLUMNS
 
 class GameInterface:
-    def __init__(self):
-        """Initialize the Pygame interface."""
+    def __init__(self, rows=ROWS, columns=COLUMNS):
+        """
+        Initialize the Pygame interface.
+        :param rows: Number of board rows
+        :param columns: Number of board columns
+        """
         pygame.init()
+        self.rows = rows
+        self.columns = columns
 
         # Colors
         self.BLUE = (0, 0, 255)
@@ -15,44 +22,76 @@ class GameInterface:
         # Dimensions
         self.SQUARESIZE = 100
         self.RADIUS = int(self.SQUARESIZE / 2 - 5)
-        self.width = 7 * self.SQUARESIZE
-        self.height = (6 + 1) * self.SQUARESIZE
+        self.width = columns * self.SQUARESIZE
+        self.height = (rows + 1) * self.SQUARESIZE
         self.size = (self.width, self.height)
 
         # Pygame screen setup
         self.screen = pygame.display.set_mode(self.size)
         pygame.display.set_caption("Connect-4")
         self.font = pygame.font.SysFont("monospace", 75)
+        self.score_font = pygame.font.SysFont("monospace", 20)
 
-    def draw_board(self, board):
-        """Draw the Connect-4 board."""
-        for r in range(6):
-            for c in range(7):
+        # The empty board never changes: render it once, then only redraw the cells that change
+        self.board_surface = self.render_empty_board()
+        self.shown_board = None  # Board currently on screen
+
+    def render_empty_board(self):
+        """Render the empty board (blue frame with black holes) to an off-screen surface."""
+        surface = pygame.Surface(self.size)
+        surface.fill(self.BLACK)
+        for r in range(self.rows):
+            for c in range(self.columns):
                 pygame.draw.rect(
-                    self.screen, self.BLUE,
+                    surface, self.BLUE,
                     (c * self.SQUARESIZE, r * self.SQUARESIZE + self.SQUARESIZE, self.SQUARESIZE, self.SQUARESIZE)
                 )
                 pygame.draw.circle(
-                    self.screen, self.BLACK,
+                    surface, self.BLACK,
                     (int(c * self.SQUARESIZE + self.SQUARESIZE / 2), int(r * self.SQUARESIZE + self.SQUARESIZE + self.SQUARESIZE / 2)),
                     self.RADIUS
                 )
+        return surface
+
+    def cell_rect(self, r, c):
+        """Screen rectangle of board cell (r, c), row 0 being the bottom row."""
+        return pygame.Rect(c * self.SQUARESIZE, self.height - (r + 1) * self.SQUARESIZE, self.SQUARESIZE, self.SQUARESIZE)
+
+    def draw_cell(self, r, c, piece):
+        """Draw one cell from the cached board, with its piece if any; returns the dirty rectangle."""
+        rect = self.cell_rect(r, c)
+        self.screen.blit(self.board_surface, rect, rect)
+        if piece:
+            pygame.draw.circle(self.screen, self.RED if piece == 1 else self.YELLOW, rect.center, self.RADIUS)
+        return rect
+
+    def draw_board(self, board):
+        """Draw the Connect-4 board, updating only the cells that changed since the last call."""
+        if self.shown_board is None or self.shown_board.shape != board.shape:
+            self.screen.blit(self.board_surface, (0, 0))
+            for r, c in zip(*np.nonzero(board)):
+                self.draw_cell(r, c, board[r][c])
+            pygame.display.update()
+        else:
+            dirty = [self.draw_cell(r, c, board[r][c]) for r, c in zip(*np.nonzero(board != self.shown_board))]
+            if dirty:
+                pygame.display.update(dirty)
+        self.shown_board = board.copy()
 
-        for r in range(6):
-            for c in range(7):
-                if board[r][c] == 1:
-                    pygame.draw.circle(
-                        self.screen, self.RED,
-                        (int(c * self.SQUARESIZE + self.SQUARESIZE / 2), self.height - int(r * self.SQUARESIZE + self.SQUARESIZE / 2)),
-                        self.RADIUS
-                    )
-                elif board[r][c] == 2:
-                    pygame.draw.circle(
-                        self.screen, self.YELLOW,
-                        (int(c * self.SQUARESIZE + self.SQUARESIZE / 2), self.height - int(r * self.SQUARESIZE + self.SQUARESIZE / 2)),
-                        self.RADIUS
-                    )
-        pygame.display.update()
+    def draw_scores(self, scores):
+        """
+        Show a score above every column, e.g. an agent's evaluation of each move.
+        :param scores: One score per column; None or -inf for columns without one
+        """
+        top_row = pygame.Rect(0, 0, self.width, self.SQUARESIZE)
+        self.screen.fill(self.BLACK, top_row)
+        for c, score in enumerate(scores):
+            if score is None or score == float('-inf'):
+                continue
+            label = self.score_font.render(f"{score:.0f}" if abs(score) != float('inf') else "win" if score > 0 else "loss",
+                                           True, self.YELLOW)
+            self.screen.blit(label, label.get_rect(center=(int(c * self.SQUARESIZE + self.SQUARESIZE / 2), self.SQUARESIZE // 2)))
+        pygame.display.update(top_row)
 
     def display_winner(self, winner):
         """Display the winner in the graphical interface."""
@@ -60,6 +99,7 @@ class GameInterface:
             label = self.font.render(f"Player {winner} wins!", True, self.RED if winner == 1 else self.YELLOW)
         else:
             label = self.font.render("It's a Draw!", True, self.BLACK)
+        top_row = pygame.Rect(0, 0, self.width, self.SQUARESIZE)
+        self.screen.fill(self.BLACK, top_row)  # Clear any column scores
         self.screen.blit(label, (40, 10))
-        pygame.display.update()
-        pygame.time.wait(3000)
+        pygame.display.update(top_row)
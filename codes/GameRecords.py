@@ -0,0 +1,176 @@
+import numbers
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+from Constants import ROWS, COLUMNS
+
+# File layout: a header, then records appended one after another. Every record starts with its
+# length so a reader can stream through (or skip) records without an index:
+#   length (uint16, bytes after this field), move count (uint8), result (int8), first player (uint8),
+#   seed (uint64), worker id (uint16), game index (uint32),
+#   two agent names (uint8 length + UTF-8 each),
+#   moves packed at 3 bits per move (least significant bit first; more on boards wider than 8 columns),
+#   per-move timings (float32 seconds).
+MAGIC = b"C4GR"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHBB")  # magic, version, width, height
+RECORD_HEADER = struct.Struct("<BbBQHI")
+LENGTH = struct.Struct("<H")
+NO_SEED = 2 ** 64 - 1  # Stored when the games were not seeded
+MAX_WORKER_ID = 2 ** 16 - 1
+MAX_GAME_INDEX = 2 ** 32 - 1
+MOVE_BITS = 3  # Bits per move on boards up to 8 columns wide
+
+# result: winning player (1 or 2), 0 for a draw
+GameRecord = namedtuple("GameRecord", "moves result first_player agents seed worker_id game_index timings")
+
+
+def move_bits(width):
+    """Bits per packed move on a board of the given width."""
+    return max(MOVE_BITS, (width - 1).bit_length())
+
+
+def check_seed(seed):
+    """
+    Make sure a tournament seed fits in a record: None, or an integer below NO_SEED (unsigned 64 bits).
+    :raises ValueError: If it does not
+    """
+    if seed is not None and not (isinstance(seed, numbers.Integral) and 0 <= seed < NO_SEED):
+        raise ValueError(f"Seed {seed!r} does not fit in a game record (0 <= seed < 2**64 - 1).")
+
+
+def check_ids(worker_id, game_index):
+    """
+    Make sure a worker id and a game index fit in a record (unsigned 16 and 32 bits).
+    :raises ValueError: If one does not
+    """
+    for name, value, largest in (("Worker id", worker_id, MAX_WORKER_ID), ("Game index", game_index, MAX_GAME_INDEX)):
+        if not (isinstance(value, numbers.Integral) and 0 <= value <= largest):
+            raise ValueError(f"{name} {value!r} does not fit in a game record (0 to {largest}).")
+
+
+def pack_moves(moves, bits=MOVE_BITS):
+    """Pack a sequence of columns (0-7 at the default 3 bits per move)."""
+    moves = np.asarray(moves, dtype=np.uint8)
+    move_bits = (moves[:, np.newaxis] >> np.arange(bits, dtype=np.uint8)) & 1
+    return np.packbits(move_bits.ravel(), bitorder="little").tobytes()
+
+
+def unpack_moves(data, count, bits=MOVE_BITS):
+    """Unpack `count` columns packed by pack_moves."""
+    move_bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=count * bits, bitorder="little")
+    return move_bits.reshape(count, bits) @ (1 << np.arange(bits))
+
+
+class GameRecordWriter:
+    """Appends game records to a log file, creating it (with its header) if needed."""
+
+    def __init__(self, path, width=COLUMNS, height=ROWS, seed=None, worker_id=0, num_games=0):
+        """
+        :param path: Log file; records are appended to an existing one
+        :param width: Board width of the games
+        :param height: Board height of the games
+        :param seed: Tournament seed of the games to come
+        :param worker_id: Worker playing them
+        :param num_games: Number of games to come
+        The last three are only checked here, so that values that do not fit in a record fail before the first
+        game rather than in the middle of the tournament.
+        :raises ValueError: If a game could last more than 255 moves, the file holds another board size,
+            or the seed, worker id or game indices do not fit in a record
+        """
+        check_seed(seed)
+        check_ids(worker_id, max(num_games - 1, 0))
+        if width * height > 255:
+            raise ValueError(f"Games on a {width}x{height} board do not fit in a record.")
+        self.move_bits = move_bits(width)
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION, width, height))
+        else:
+            with open(path, "rb") as f:
+                header = read_header(f, path)
+            if header != (width, height):
+                self.file.close()
+                raise ValueError(f"{path} holds games on a {header[0]}x{header[1]} board.")
+        self.count = 0
+
+    def write(self, moves, result, agents, seed=None, worker_id=0, game_index=0, first_player=1, timings=None):
+        """
+        Append one game.
+        :param moves: Columns played, in order
+        :param result: Winning player (1 or 2), 0 for a draw
+        :param agents: Names of the agents playing as player 1 and player 2
+        :param seed: Tournament seed the game seed was derived from (see Utility.game_seed)
+        :param worker_id: Worker that played the game
+        :param game_index: Index of the game within the worker's run
+        :param first_player: Player who moved first
+        :param timings: Seconds spent on each move
+        """
+        check_seed(seed)  # Before anything is written
+        check_ids(worker_id, game_index)
+        names = b"".join(bytes([len(name)]) + name for name in (agent.encode()[:255] for agent in agents))
+        timings = np.asarray(timings if timings is not None else np.zeros(len(moves)), dtype="<f4")
+        body = (RECORD_HEADER.pack(len(moves), result, first_player, NO_SEED if seed is None else seed, worker_id,
+                                   game_index)
+                + names + pack_moves(moves, self.move_bits) + timings.tobytes())
+        self.file.write(LENGTH.pack(len(body)) + body)
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_header(f, path):
+    """Check the file header; returns (width, height)."""
+    magic, version, width, height = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a game record file.")
+    return width, height
+
+
+def read_records(path):
+    """
+    Stream the games of a log file one at a time, without loading the file.
+    :param path: File written by GameRecordWriter
+    :return: Generator of GameRecord
+    """
+    with open(path, "rb", buffering=1 << 16) as f:
+        width, _ = read_header(f, path)
+        bits = move_bits(width)
+        while True:
+            length = f.read(LENGTH.size)
+            if len(length) < LENGTH.size:
+                return
+            body = f.read(LENGTH.unpack(length)[0])
+            count, result, first_player, seed, worker_id, game_index = RECORD_HEADER.unpack_from(body)
+            offset = RECORD_HEADER.size
+            agents = []
+            for _ in range(2):
+                size = body[offset]
+                agents.append(body[offset + 1:offset + 1 + size].decode())
+                offset += 1 + size
+            packed_size = (count * bits + 7) // 8
+            moves = unpack_moves(body[offset:offset + packed_size], count, bits)
+            timings = np.frombuffer(body, dtype="<f4", count=count, offset=offset + packed_size)
+            yield GameRecord(moves.tolist(), result, first_player, tuple(agents),
+                             None if seed == NO_SEED else seed, worker_id, game_index, timings)
+
+
+def count_records(path):
+    """Number of games in a log file, skipping over the records without decoding them."""
+    count = 0
+    with open(path, "rb", buffering=1 << 16) as f:
+        read_header(f, path)
+        end = os.fstat(f.fileno()).st_size
+        while f.tell() < end:
+            f.seek(LENGTH.unpack(f.read(LENGTH.size))[0], os.SEEK_CUR)
+            count += 1
+    return count
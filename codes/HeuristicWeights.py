@@ -0,0 +1,29 @@
+import json
+import os
+
+# Environment variable naming a weight file every agent loads at startup when no weights are given
+WEIGHTS_ENV_VAR = "CONNECT4_WEIGHTS"
+
+
+def load_weights(source=None):
+    """
+    Load tuned evaluation weights, as written by WeightTuner.py.
+    The file holds one optional section per agent: "feature_weights" (FeatureBasedHeuristicAgent),
+    "heuristic_matrix" (BoardHeuristicAI) and "evaluate_board" (the Minimax agents' "center", "four" and optional
+    "positional" terms; the positional term weighs BoardHeuristicAI's positional score and is off by default).
+    :param source: Weight dict, path of a weight file, or None for the file named by CONNECT4_WEIGHTS
+    :return: Dict of sections; empty when there is nothing to load (agents keep their built-in weights)
+    """
+    if isinstance(source, dict):
+        return source
+    path = source if source is not None else os.environ.get(WEIGHTS_ENV_VAR)
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_weights(path, weights):
+    """Write a weight file readable by load_weights."""
+    with open(path, "w") as f:
+        json.dump(weights, f, indent=2)
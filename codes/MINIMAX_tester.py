@@ -2,79 +2,137 @@ import time
 import tracemalloc
 from Minimax_variations import MinimaxAI, MinimaxAIWithPruning
 from Environment import Connect4
+from GameRecords import GameRecordWriter
+from Utility import game_seed, seed_agents
 
-def simulate_games_with_metrics(game_class, depth1, depth2, num_games=10):
+def simulate_games_with_metrics(game_class, depth1, depth2, num_games=10, seed=None, worker_id=0, oracle=None,
+                                record_path=None, memory_profiler=None, search_profiler=None):
     """
     Simulate games between two agents with alternating starts and track their performance metrics.
     Args:
-        game_class: Class of the Connect4 game instance.
+        game_class: Class of the Connect4 game instance (or a factory such as functools.partial(Connect4, 7, 8)).
         depth1: Depth of the first agent (MinimaxAI).
         depth2: Depth of the second agent (MinimaxAI).
         num_games: Total number of games to simulate (must be even for equal starts).
+        seed: Tournament seed; each game derives its own seed from it.
+        worker_id: Index of the worker running these games.
+        oracle: Optional SolverOracle grading every move it can solve.
+        record_path: Optional game log every game is appended to (see GameRecords).
+        memory_profiler: Optional MemoryProfiler recording a memory timeline of every game instead of tracing
+            allocations per move (the memory metrics are then the agents' retained state); its sampler is stopped
+            when the games end, closing it is left to the caller.
+        search_profiler: Optional SearchProfiler collecting the hot functions of both agents' searches
+            (pass a memory_profiler too, or the profile includes the cost of tracemalloc).
     """
     agent1 = MinimaxAIWithPruning(depth1)  # Switch agents to MinimaxAIWithPruning() for testing MINIMAX with alpha-beta pruning
     agent2 = MinimaxAIWithPruning(depth2)
 
     results = {"agent1_wins": 0, "agent2_wins": 0, "draws": 0}
     metrics = {
-        "agent1": {"total_time": 0, "total_memory": 0, "move_count": 0},
-        "agent2": {"total_time": 0, "total_memory": 0, "move_count": 0},
+        "agent1": {"total_time": 0, "total_memory": 0, "move_count": 0, "graded_moves": 0, "optimal_moves": 0},
+        "agent2": {"total_time": 0, "total_memory": 0, "move_count": 0, "graded_moves": 0, "optimal_moves": 0},
     }
 
     agent1_start = num_games // 2  # Number of games where agent1 starts
     agent2_start = num_games - agent1_start  # Number of games where agent2 starts
-
-    for game_num in range(num_games):
-        game = game_class()
-        game.reset_game()
-
-        # Determine starting agent
-        if game_num < agent1_start:
-            current_agent = agent1
-            next_agent = agent2
-            current_agent_name = "agent1"
-            next_agent_name = "agent2"
-        else:
-            current_agent = agent2
-            next_agent = agent1
-            current_agent_name = "agent2"
-            next_agent_name = "agent1"
-
-        # Play the game
-        while not game.game_over:
-            # Measure time and memory for the current move
-            tracemalloc.start()
-            start_time = time.time()
-
-            col = current_agent.get_best_move(game)
-
-            end_time = time.time()
-            current_memory, _ = tracemalloc.get_traced_memory()
-            tracemalloc.stop()
-
-            # Update metrics
-            metrics[current_agent_name]["total_time"] += (end_time - start_time)
-            metrics[current_agent_name]["total_memory"] += current_memory / (1024 * 1024)  # Convert to MB
-            metrics[current_agent_name]["move_count"] += 1
-
-            # Make the move if valid
-            if game.is_valid_location(col):
-                game.drop_piece(col)
-
-                # Check game state
-                if game.check_winner():
-                    results[f"{current_agent_name}_wins"] += 1
-                    game.game_over = True
-                    break
-                elif game.is_draw():
-                    results["draws"] += 1
-                    game.game_over = True
-                    break
-
-                # Switch agents
-                game.switch_player()
-                current_agent, next_agent = next_agent, current_agent
-                current_agent_name, next_agent_name = next_agent_name, current_agent_name
+    rows, columns = game_class().board.shape
+    recorder = (GameRecordWriter(record_path, columns, rows, seed, worker_id, num_games)
+                if record_path is not None else None)
+    names = {"agent1": f"MinimaxAIWithPruning(depth={depth1})", "agent2": f"MinimaxAIWithPruning(depth={depth2})"}
+
+    try:
+        for game_num in range(num_games):
+            game = game_class()
+            game.reset_game()
+            seed_agents([agent1, agent2], game_seed(seed, game_num, worker_id))
+            moves, timings = [], []
+            result = 0
+            if memory_profiler is not None:
+                memory_profiler.start_game(game_num)
+
+            # Determine starting agent
+            if game_num < agent1_start:
+                current_agent = agent1
+                next_agent = agent2
+                current_agent_name = "agent1"
+                next_agent_name = "agent2"
+            else:
+                current_agent = agent2
+                next_agent = agent1
+                current_agent_name = "agent2"
+                next_agent_name = "agent1"
+
+            # Play the game
+            while not game.game_over:
+                # Measure time and memory for the current move
+                if memory_profiler is None:
+                    tracemalloc.start()
+                else:
+                    memory_profiler.start_move()
+                if search_profiler is not None:
+                    search_profiler.start(names[current_agent_name])
+                start_time = time.time()
+
+                col = current_agent.get_best_move(game)
+
+                end_time = time.time()
+                if search_profiler is not None:
+                    search_profiler.stop()
+                if memory_profiler is None:
+                    current_memory, _ = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                else:
+                    current_memory = memory_profiler.end_move(names[current_agent_name], current_agent, end_time - start_time)
+
+                # Update metrics
+                metrics[current_agent_name]["total_time"] += (end_time - start_time)
+                metrics[current_agent_name]["total_memory"] += current_memory / (1024 * 1024)  # Convert to MB
+                metrics[current_agent_name]["move_count"] += 1
+                timings.append(end_time - start_time)
+
+                # Grade the move against the exact solution
+                if oracle is not None and game.is_valid_location(col):
+                    grade = oracle.grade(game, col)
+                    if grade is not None:
+                        metrics[current_agent_name]["graded_moves"] += 1
+                        metrics[current_agent_name]["optimal_moves"] += grade[0] == grade[1]
+
+                # Make the move if valid
+                if game.is_valid_location(col):
+                    game.drop_piece(col)
+                    moves.append(col)
+
+                    # Check game state
+                    if game.check_winner():
+                        results[f"{current_agent_name}_wins"] += 1
+                        result = game.current_player
+                        game.game_over = True
+                        break
+                    elif game.is_draw():
+                        results["draws"] += 1
+                        game.game_over = True
+                        break
+
+                    # Switch agents
+                    game.switch_player()
+                    current_agent, next_agent = next_agent, current_agent
+                    current_agent_name, next_agent_name = next_agent_name, current_agent_name
+                else:
+                    timings.pop()  # The invalid move is retried
+
+            if recorder is not None:
+                # The starting agent always plays as player 1
+                player_names = (names["agent1"], names["agent2"]) if game_num < agent1_start else (names["agent2"], names["agent1"])
+                recorder.write(moves, result, player_names, seed, worker_id, game_num, timings=timings)
+            if memory_profiler is not None:
+                memory_profiler.end_game(result)
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if memory_profiler is not None:
+            memory_profiler.stop_sampler()  # The profiler itself stays open for the caller
+        if search_profiler is not None:
+            search_profiler.close()  # Stops its sampling timer; the samples are kept
 
     # Calculate averages for each agent
     for agent_name in metrics:
@@ -84,17 +142,25 @@ def simulate_games_with_metrics(game_class, depth1, depth2, num_games=10):
     return results, metrics
 
 
-def test_depth_pairs(game_class, depth_pairs, num_games_per_pair):
+def test_depth_pairs(game_class, depth_pairs, num_games_per_pair, seed=None, oracle=None, memory_profiler=None,
+                     search_profiler=None):
     """
     Test multiple pairs of depths for MinimaxAI.
     Args:
         game_class: Class of the Connect4 game instance.
         depth_pairs: List of depth pairs to test.
         num_games_per_pair: Number of games to simulate for each pair.
+        seed: Tournament seed shared by all pairs.
+        oracle: Optional SolverOracle grading every move it can solve.
+        memory_profiler: Optional MemoryProfiler (see simulate_games_with_metrics).
+        search_profiler: Optional SearchProfiler (see simulate_games_with_metrics); agents of the same depth
+            share one profile across pairs.
     """
     for depth1, depth2 in depth_pairs:
         print(f"\nTesting Depth {depth1} vs Depth {depth2}...")
-        results, metrics = simulate_games_with_metrics(game_class, depth1, depth2, num_games_per_pair)
+        results, metrics = simulate_games_with_metrics(game_class, depth1, depth2, num_games_per_pair, seed=seed,
+                                                      oracle=oracle, memory_profiler=memory_profiler,
+                                                      search_profiler=search_profiler)
 
         print(f"\nResults for Depth {depth1} vs Depth {depth2}:")
         print(f"Agent with Depth {depth1} Wins: {results['agent1_wins']}")
@@ -106,6 +172,11 @@ def test_depth_pairs(game_class, depth_pairs, num_games_per_pair):
               f"Average Memory: {metrics['agent1']['avg_memory']:.6f} MB")
         print(f"Agent Depth {depth2} - Average Time: {metrics['agent2']['avg_time']:.6f} sec, "
               f"Average Memory: {metrics['agent2']['avg_memory']:.6f} MB")
+        for agent_name, depth in (("agent1", depth1), ("agent2", depth2)):
+            graded = metrics[agent_name]["graded_moves"]
+            if graded:
+                rate = metrics[agent_name]["optimal_moves"] / graded * 100
+                print(f"Agent Depth {depth} - Optimal Moves: {rate:.2f}% of {graded} graded")
 
 
 if __name__ == "__main__":
@@ -113,4 +184,4 @@ if __name__ == "__main__":
     num_games_per_pair = 10
 
     # Run the tests
-    test_depth_pairs(Connect4, depth_pairs, num_games_per_pair)
+    test_depth_pairs(Connect4, depth_pairs, num_games_per_pair, seed=2024)
@@ -0,0 +1,166 @@
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Timeline file layout: one JSON object per game, holding
+#   "game": game index, "result": winner (1 or 2, 0 for a draw),
+#   "moves": one record per move with the mover's "agent" name, "time" (seconds), "rss" (bytes after the move),
+#            "peak_rss" (highest sampled RSS during the move), "blocks" (net change in allocated blocks: what the
+#            search left allocated, not how much it allocated and freed on the way), "peak_blocks" (highest sampled
+#            rise in allocated blocks during the move; equal to "blocks" without a sampler)
+#            and "retained" (the mover's own accounting: component -> {"bytes", "entries"}),
+#   "peak_rss": highest RSS of the game, "retained": last retained state of every agent.
+
+
+def rss_bytes():
+    """Resident set size of the process; the peak RSS where /proc is not available (0 if neither is)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        if resource is None:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # Bytes on macOS, KiB elsewhere
+
+
+def retained_memory(agent):
+    """
+    State an agent keeps between moves (tables, caches, books), by its own accounting.
+    Components shared by several agents, such as one EvaluationCache, show up under each of them.
+    :return: Dict component -> {"bytes": ..., "entries": ...}; empty for agents that keep nothing
+    """
+    usage = getattr(agent, "memory_usage", None)
+    return usage() if usage is not None else {}
+
+
+def retained_bytes(retained):
+    """Total bytes of a retained_memory dict."""
+    return sum(component["bytes"] for component in retained.values())
+
+
+class MemoryProfiler:
+    """
+    Opt-in memory timeline of a tester run. Around every move it records the mover's retained state,
+    the process RSS and the net number of blocks the search left allocated; with a sample_interval, a background
+    thread also samples the RSS and allocated blocks during the move, catching part of the transient peak.
+    Unlike tracemalloc it does not hook every allocation, so the games run at nearly full speed, but the allocation
+    counts are coarse: a net difference per move plus the highest sample. Use it as a context manager, or call
+    close() (stop_sampler() when it is shared by several runs) so that the sampler thread does not outlive the run.
+    """
+
+    def __init__(self, path=None, sample_interval=None, verbose=True):
+        """
+        :param path: File the per-game timelines are written to (JSON lines); None keeps them in memory only
+        :param sample_interval: Seconds between RSS samples taken during a move by a background thread;
+            None only samples before and after each move
+        :param verbose: Print a one-line summary per game
+        """
+        self.file = open(path, "w") if path is not None else None
+        self.sample_interval = sample_interval
+        self.verbose = verbose
+        self.games = []  # Timelines of the finished games
+        self.game = None
+        self.blocks = 0
+        self.move_peak_rss = 0
+        self.move_peak_blocks = 0
+        self.moving = threading.Event()  # Set while an agent is searching: the sampler only samples then
+        self.sampling = False
+        self.sampler = None
+
+    def start_game(self, game_index):
+        """Start the timeline of a new game."""
+        self.game = {"game": game_index, "result": None, "moves": [], "peak_rss": rss_bytes(), "retained": {}}
+
+    def start_move(self):
+        """Call right before an agent starts searching."""
+        self.move_peak_rss = rss_bytes()
+        if self.sample_interval is not None and self.sampler is None:
+            self.sampling = True
+            self.sampler = threading.Thread(target=self.sample_rss, daemon=True)
+            self.sampler.start()
+        self.blocks = self.move_peak_blocks = sys.getallocatedblocks()
+        self.moving.set()
+
+    def sample_rss(self):
+        """Sampler thread: keep track of the highest RSS and allocated blocks seen during the current move."""
+        while True:
+            self.moving.wait()
+            if not self.sampling:
+                return
+            self.move_peak_rss = max(self.move_peak_rss, rss_bytes())
+            self.move_peak_blocks = max(self.move_peak_blocks, sys.getallocatedblocks())
+            time.sleep(self.sample_interval)
+
+    def end_move(self, name, agent, elapsed):
+        """
+        Call right after the agent returned its move.
+        :param name: Name of the agent in the timeline
+        :param agent: The agent, asked for its retained state
+        :param elapsed: Seconds the move took
+        :return: Bytes the agent retains after the move
+        """
+        self.moving.clear()
+        blocks = sys.getallocatedblocks() - self.blocks
+        rss = rss_bytes()
+        retained = retained_memory(agent)
+        self.game["moves"].append({
+            "agent": name,
+            "time": elapsed,
+            "rss": rss,
+            "peak_rss": max(self.move_peak_rss, rss),
+            "blocks": blocks,
+            "peak_blocks": max(self.move_peak_blocks - self.blocks, blocks),
+            "retained": retained,
+        })
+        self.game["peak_rss"] = max(self.game["peak_rss"], self.move_peak_rss, rss)
+        self.game["retained"][name] = retained
+        return retained_bytes(retained)
+
+    def end_game(self, result):
+        """
+        Close the timeline of the current game and write it out.
+        :param result: Winning player (1 or 2), 0 for a draw
+        """
+        game = self.game
+        game["result"] = result
+        self.games.append(game)
+        if self.file is not None:
+            self.file.write(json.dumps(game) + "\n")
+            self.file.flush()
+        if self.verbose:
+            retained = ", ".join(f"{name} {retained_bytes(usage) / 2 ** 20:.1f} MiB"
+                                 for name, usage in game["retained"].items())
+            blocks = sum(move["blocks"] for move in game["moves"])
+            print(f"Memory: game {game['game']} peak RSS {game['peak_rss'] / 2 ** 20:.1f} MiB, "
+                  f"{blocks:+d} blocks, retained: {retained or 'nothing'}")
+        self.game = None
+
+    def stop_sampler(self):
+        """Stop the sampler thread; the next move starts a new one."""
+        self.sampling = False
+        self.moving.set()  # Wake the sampler up so that it sees it has to stop
+        if self.sampler is not None:
+            self.sampler.join()
+            self.sampler = None
+        self.moving.clear()
+
+    def close(self):
+        """Stop the sampler thread and close the timeline file."""
+        self.stop_sampler()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
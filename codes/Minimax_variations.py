@@ -1,42 +1,48 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import Value
+
 import numpy as np
-import random
 from Environment import Connect4
-
-
-
-class BoardHeuristicAI:
-    def __init__(self):
-        """Initialize the heuristic matrix for evaluating moves."""
-        self.heuristic_matrix = np.array([
-            [3, 4, 5, 7, 5, 4, 3],
-            [4, 6, 8, 10, 8, 6, 4],
-            [5, 8, 11, 13, 11, 8, 5],
-            [5, 8, 11, 13, 11, 8, 5],
-            [4, 6, 8, 10, 8, 6, 4],
-            [3, 4, 5, 7, 5, 4, 3]
-        ])
-
-    def evaluate_move(self, game, col):
-        """Evaluate the heuristic score of a move for the current player."""
-        if not game.is_valid_location(col):
-            return float('-inf')  # Invalid moves should not be considered
-
-        # Simulate dropping the piece
-        row = game.get_next_open_row(col)
-        game.board[row][col] = game.current_player
-        score = self.heuristic_matrix[row][col]
-        game.board[row][col] = 0  # Undo the move
-        return score
+from BoardHeuristic import BoardHeuristicAI, PositionalScore
+from Bitboard import Position, board_layout
+from EvaluationCache import board_key
+from Solver import Solver
+from HeuristicWeights import load_weights
+from Utility import make_rng
 
 
 class MinimaxAI:
-    def __init__(self, depth):
-        """Initialize the Minimax AI with a given search depth."""
+    def __init__(self, depth, rng=None, weights=None, cache=None):
+        """
+        Initialize the Minimax AI with a given search depth.
+        :param depth: Depth of the search tree
+        :param rng: Seed or numpy Generator used for tie-breaking
+        :param weights: Tuned evaluation weights, a weight file or dict (see HeuristicWeights.load_weights)
+        :param cache: Optional EvaluationCache for the leaf evaluations, which can be shared with other agents
+        """
         self.depth = depth
-        self.heuristic = BoardHeuristicAI()
-
-    def minimax(self, game, depth, maximizing_player):
-        """Minimax algorithm with heuristic evaluation."""
+        self.rng = make_rng(rng)
+        weights = load_weights(weights)
+        self.heuristic = BoardHeuristicAI(weights=weights)
+        self.center_weight = weights.get("evaluate_board", {}).get("center", 3)  # Per own disc in the center column
+        self.four_weight = weights.get("evaluate_board", {}).get("four", 100)  # Per four in a row
+        self.positional_weight = weights.get("evaluate_board", {}).get("positional", 0)  # Per point of positional score
+        self.cache = cache
+        self.root_pool = None  # Process pool of the root-split search, kept between moves
+        self.root_pool_workers = 0
+        self.root_bound = None
+        self.stats = {}
+
+    def __getstate__(self):
+        # Root-split workers get a copy of the agent without its pool
+        return dict(self.__dict__, root_pool=None, root_bound=None)
+
+    def minimax(self, game, depth, maximizing_player, symmetric=False):
+        """
+        Minimax algorithm with heuristic evaluation.
+        :param symmetric: True if the board is its own mirror image; only the left half is searched
+        """
         winner = game.check_winner()
         if depth == 0 or winner or game.is_draw():
             if winner == 1:
@@ -47,6 +53,8 @@ class MinimaxAI:
                 return None, self.evaluate_board(game)
 
         valid_columns = [c for c in range(game.columns) if game.is_valid_location(c)]
+        if symmetric:
+            valid_columns = [c for c in valid_columns if c <= (game.columns - 1) // 2]  # Mirrored columns score the same
 
         if maximizing_player:
             value = float('-inf')
@@ -61,7 +69,9 @@ class MinimaxAI:
                     best_columns = [col]  # Reset and track the new best column
                 elif new_score == value:
                     best_columns.append(col)  # Add to the list of best columns
-            best_col = random.choice(best_columns)  # Randomly choose among the best columns
+            if symmetric:
+                best_columns += [game.columns - 1 - c for c in best_columns if 2 * c != game.columns - 1]
+            best_col = best_columns[self.rng.integers(len(best_columns))]  # Randomly choose among the best columns
             return best_col, value
         else:
             value = float('inf')
@@ -76,17 +86,34 @@ class MinimaxAI:
                     best_columns = [col]  # Reset and track the new best column
                 elif new_score == value:
                     best_columns.append(col)  # Add to the list of best columns
-            best_col = random.choice(best_columns)  # Randomly choose among the best columns
+            if symmetric:
+                best_columns += [game.columns - 1 - c for c in best_columns if 2 * c != game.columns - 1]
+            best_col = best_columns[self.rng.integers(len(best_columns))]  # Randomly choose among the best columns
             return best_col, value
 
 
     def evaluate_board(self, game):
-        """Evaluate the board state for intermediate nodes."""
+        """Evaluate the board state for intermediate nodes, through the evaluation cache if there is one."""
+        if self.cache is None:
+            score = self.board_score(game)
+        else:
+            key = ("evaluate_board", self.center_weight, self.four_weight, board_key(game.board))
+            score = self.cache.get_or_compute(key, lambda: self.board_score(game))
+        if self.positional_weight:
+            score += self.positional_weight * self.positional_score(game)
+        return score
+
+    def positional_score(self, game):
+        """BoardHeuristicAI positional score of the board (player 1's discs minus player 2's)."""
+        return self.heuristic.positional_score(game.board)
+
+    def board_score(self, game):
+        """Heuristic score of the board: center column discs and fours in a row."""
         score = 0
 
         # Center column preference
         center_array = [game.board[r][game.columns // 2] for r in range(game.rows)]
-        score += (center_array.count(1) - center_array.count(2)) * 3
+        score += (center_array.count(1) - center_array.count(2)) * self.center_weight
 
         # Evaluate horizontal, vertical, and diagonal windows
         for r in range(game.rows):
@@ -116,23 +143,83 @@ class MinimaxAI:
         """Evaluate a specific window of four cells."""
         score = 0
         if list(window).count(1) == 4:
-            score += 100
+            score += self.four_weight
         elif list(window).count(2) == 4:
-            score -= 100
+            score -= self.four_weight
         return score
 
-    def get_best_move(self, game):
-        """Get the best move using the Minimax algorithm."""
-        best_col, _ = self.minimax(game, self.depth, True)
+    def memory_usage(self):
+        """Retained state by component (see MemoryProfile)."""
+        return self.cache.memory_usage() if self.cache is not None else {}
+
+    def get_best_move(self, game, workers=None):
+        """
+        Get the best move for the player to move using the Minimax algorithm.
+        Search values are from player 1's point of view; the value in self.stats is for the player to move.
+        :param workers: Search the root columns in parallel with this many processes (kept until close())
+        """
+        symmetric = np.array_equal(game.board, game.board[:, ::-1])
+        if workers and self.depth > 1:
+            return split_root(self, game, symmetric, workers)
+        maximizing_player = game.current_player == 1
+        best_col, value = self.minimax(game, self.depth, maximizing_player, symmetric)
+        self.stats = {"value": value if maximizing_player else -value}
         return best_col
-    
+
+    def close(self):
+        """Stop the root-split worker pool, if any."""
+        close_root_pool(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
 class MinimaxAIWithPruning:
-    def __init__(self, depth):
-        """Initialize the Minimax AI with a given search depth."""
+    def __init__(self, depth, rng=None, endgame_empty_cells=None, threat_pruning=False, aspiration_window=None,
+                 weights=None, cache=None, quiescence_depth=0):
+        """
+        Initialize the Minimax AI with a given search depth.
+        :param depth: Depth of the search tree
+        :param rng: Seed or numpy Generator used for tie-breaking
+        :param endgame_empty_cells: Solve the position exactly once this few empty cells remain
+        :param threat_pruning: Take immediate wins, play forced blocks only and never play under a threat
+        :param aspiration_window: Half-width of the window searched around the previous move's value
+        :param weights: Tuned evaluation weights, a weight file or dict (see HeuristicWeights.load_weights)
+        :param cache: Optional EvaluationCache for the leaf evaluations, which can be shared with other agents
+        :param quiescence_depth: Forced blocks played out past the leaves before evaluating (0 disables the extension)
+        """
         self.depth = depth
-        self.heuristic = BoardHeuristicAI()
-
-    def minimax_with_pruning(self, game, depth, alpha, beta, maximizing_player):
+        self.rng = make_rng(rng)
+        weights = load_weights(weights)
+        self.heuristic = BoardHeuristicAI(weights=weights)
+        self.center_weight = weights.get("evaluate_board", {}).get("center", 3)  # Per own disc in the center column
+        self.four_weight = weights.get("evaluate_board", {}).get("four", 100)  # Per four in a row
+        self.positional_weight = weights.get("evaluate_board", {}).get("positional", 0)  # Per point of positional score
+        self.cache = cache
+        self.quiescence_depth = quiescence_depth
+        self.endgame_empty_cells = endgame_empty_cells
+        self.solver = Solver() if endgame_empty_cells is not None else None
+        self.threat_pruning = threat_pruning
+        self.aspiration_window = aspiration_window
+        self.last_value = None  # Value of the previous move for its mover, the guess of the next aspiration search
+        self.layout = None  # BitboardLayout of the board searched
+        self.bitboards = None  # [mask, player 1 discs, player 2 discs], kept in sync during a search
+        self.positional = None  # PositionalScore of the board, kept in sync during a search when its weight is set
+        self.nodes = 0
+        self.root_pool = None  # Process pool of the root-split search, kept between moves
+        self.root_pool_workers = 0
+        self.root_bound = None
+        self.stats = {}
+
+    def __getstate__(self):
+        # The solver's table is large; copies build an empty one when they first reach the endgame.
+        # Root-split workers never do, and get the agent without its pool.
+        return dict(self.__dict__, solver=None, layout=None, bitboards=None, positional=None, root_pool=None,
+                    root_bound=None)
+
+    def minimax_with_pruning(self, game, depth, alpha, beta, maximizing_player, symmetric=False):
         """
         Minimax algorithm with alpha-beta pruning.
         :param game: The Connect4 game instance.
@@ -140,18 +227,41 @@ class MinimaxAIWithPruning:
         :param alpha: Alpha value for pruning.
         :param beta: Beta value for pruning.
         :param maximizing_player: Boolean, True if maximizing player's turn.
+        :param symmetric: True if the board is its own mirror image; only the left half is searched.
         :return: Best column and its heuristic score.
         """
+        if self.bitboards is None:  # Root call: build the bitboards mirrored by every simulated move
+            self.load_bitboards(game)
+            try:
+                return self.minimax_with_pruning(game, depth, alpha, beta, maximizing_player, symmetric)
+            finally:
+                self.bitboards = self.positional = None
+        bitboards = self.bitboards
+        positional = self.positional
+        self.nodes += 1
+
         winner = game.check_winner()
         if depth == 0 or winner or game.is_draw():
             if winner == 1:
                 return None, float('inf')  # Maximizer wins
             elif winner == 2:
                 return None, float('-inf')  # Minimizer wins
+            elif depth == 0 and self.quiescence_depth:
+                return None, self.quiescence(game, maximizing_player, self.quiescence_depth)  # Look past the horizon
             else:
                 return None, self.evaluate_board(game)  # Heuristic evaluation for intermediate states
 
         valid_columns = [c for c in range(game.columns) if game.is_valid_location(c)]
+        if symmetric:
+            valid_columns = [c for c in valid_columns if c <= (game.columns - 1) // 2]  # Mirrored columns score the same
+
+        if self.threat_pruning:
+            valid_columns, decided = self.filter_threats(valid_columns, maximizing_player)
+            if decided is not None:
+                return decided
+
+        valid_columns = self.order_columns(valid_columns, maximizing_player)
+        cell_bit = self.layout.cell_bit
 
         if maximizing_player:
             value = float('-inf')
@@ -159,8 +269,17 @@ class MinimaxAIWithPruning:
             for col in valid_columns:
                 row = game.get_next_open_row(col)
                 game.board[row][col] = 1  # Simulate maximizer's move
+                bit = cell_bit(row, col)
+                bitboards[0] |= bit
+                bitboards[1] |= bit
+                if positional is not None:
+                    positional.drop(col, 1)
                 _, new_score = self.minimax_with_pruning(game, depth - 1, alpha, beta, False)
                 game.board[row][col] = 0  # Undo the move
+                bitboards[0] ^= bit
+                bitboards[1] ^= bit
+                if positional is not None:
+                    positional.undo(col, 1)
                 if new_score > value:
                     value = new_score
                     best_columns = [col]  # Reset and track the new best column
@@ -169,7 +288,9 @@ class MinimaxAIWithPruning:
                 alpha = max(alpha, value)
                 if alpha >= beta:
                     break  # Beta cutoff
-            best_col = random.choice(best_columns)  # Randomly choose among the best columns,
+            if symmetric:
+                best_columns += [game.columns - 1 - c for c in best_columns if 2 * c != game.columns - 1]
+            best_col = best_columns[self.rng.integers(len(best_columns))]  # Randomly choose among the best columns,
             return best_col, value
         else:
             value = float('inf')
@@ -177,8 +298,17 @@ class MinimaxAIWithPruning:
             for col in valid_columns:
                 row = game.get_next_open_row(col)
                 game.board[row][col] = 2  # Simulate minimizer's move
+                bit = cell_bit(row, col)
+                bitboards[0] |= bit
+                bitboards[2] |= bit
+                if positional is not None:
+                    positional.drop(col, 2)
                 _, new_score = self.minimax_with_pruning(game, depth - 1, alpha, beta, True)
                 game.board[row][col] = 0  # Undo the move
+                bitboards[0] ^= bit
+                bitboards[2] ^= bit
+                if positional is not None:
+                    positional.undo(col, 2)
                 if new_score < value:
                     value = new_score
                     best_columns = [col]  # Reset and track the new best column
@@ -187,16 +317,132 @@ class MinimaxAIWithPruning:
                 beta = min(beta, value)
                 if alpha >= beta:
                     break  # Alpha cutoff
-            best_col = random.choice(best_columns)  # Randomly choose among the best columns
+            if symmetric:
+                best_columns += [game.columns - 1 - c for c in best_columns if 2 * c != game.columns - 1]
+            best_col = best_columns[self.rng.integers(len(best_columns))]  # Randomly choose among the best columns
             return best_col, value
 
+    def load_bitboards(self, game):
+        """Build the bitboards (and positional score, if it is weighted) of a root position, in the layout of its size."""
+        self.layout = board_layout(game.columns, game.rows)
+        self.bitboards = self.layout.board_bitmaps(game.board)
+        self.positional = PositionalScore(self.heuristic, game.board) if self.positional_weight else None
+
+    def filter_threats(self, valid_columns, maximizing_player):
+        """
+        Threat pruning of a node, read from the bitboards of the current search.
+        :param valid_columns: Columns that can be played
+        :param maximizing_player: Boolean, True if maximizing player's turn.
+        :return: (columns left to search, (best column, value) when the node is already decided, else None)
+        """
+        bitboards = self.bitboards
+        layout = self.layout
+        winning_positions, column_mask = layout.winning_positions, layout.column_mask
+        player = 1 if maximizing_player else 2
+        win_value = float('inf') if maximizing_player else float('-inf')
+        mask = bitboards[0]
+        possible = (mask + layout.bottom_mask) & layout.board_mask
+
+        # Immediate win: no need to look any further
+        winning_moves = winning_positions(bitboards[player], mask) & possible
+        if winning_moves:
+            winning_columns = [col for col in range(layout.width) if winning_moves & column_mask(col)]
+            return [], (winning_columns[self.rng.integers(len(winning_columns))], win_value)
+
+        # Forced block, and never play right under a cell where the opponent would win
+        opponent_wins = winning_positions(bitboards[3 - player], mask)
+        forced_moves = possible & opponent_wins
+        if forced_moves & (forced_moves - 1):  # Double threat: the opponent wins whatever we do
+            return [], (layout.bit_column(forced_moves & -forced_moves), -win_value)
+        if forced_moves:
+            possible = forced_moves
+        non_losing = possible & ~(opponent_wins >> 1)
+        if not non_losing:  # Every move hands the opponent a win
+            return [], (valid_columns[self.rng.integers(len(valid_columns))], -win_value)
+        valid_columns = [col for col in valid_columns if non_losing & column_mask(col)]
+        return valid_columns, None
+
+    def quiescence(self, game, maximizing_player, limit):
+        """
+        Value of a leaf, looking past the horizon along forcing moves only: an immediate win ends
+        the line, and a single forced block is played out before the position is evaluated.
+        :param game: The Connect4 game instance.
+        :param maximizing_player: Boolean, True if maximizing player's turn.
+        :param limit: Forced blocks that may still be played
+        :return: Heuristic value of the quiet position, or +-inf when the forcing line decides the game
+        """
+        bitboards = self.bitboards
+        layout = self.layout
+        player = 1 if maximizing_player else 2
+        win_value = float('inf') if maximizing_player else float('-inf')
+        mask = bitboards[0]
+        # Fours already on the board: the search does not stop at every win (check_winner only sees one player)
+        if layout.alignment(bitboards[3 - player]):  # The last move won
+            return -win_value
+        if layout.alignment(bitboards[player]):  # The side to move won earlier in the line
+            return win_value
+        possible = (mask + layout.bottom_mask) & layout.board_mask
+        if layout.winning_positions(bitboards[player], mask) & possible:
+            return win_value
+        forced_moves = possible & layout.winning_positions(bitboards[3 - player], mask)
+        if forced_moves & (forced_moves - 1):  # Two threats to block: the opponent wins next move
+            return -win_value
+        if not forced_moves or limit == 0:
+            return self.evaluate_board(game)
+
+        # Play the block, then see whether the opponent has a forcing reply
+        self.nodes += 1
+        col = layout.bit_column(forced_moves)
+        row = game.get_next_open_row(col)
+        game.board[row][col] = player
+        bitboards[0] |= forced_moves
+        bitboards[player] |= forced_moves
+        if self.positional is not None:
+            self.positional.drop(col, player)
+        value = self.quiescence(game, not maximizing_player, limit - 1)
+        game.board[row][col] = 0  # Undo the block
+        bitboards[0] ^= forced_moves
+        bitboards[player] ^= forced_moves
+        if self.positional is not None:
+            self.positional.undo(col, player)
+        return value
+
+    def order_columns(self, columns, maximizing_player):
+        """
+        Order in which the columns of a node are searched; subclasses can put likely best moves first.
+        :param columns: Columns to search, in ascending order
+        :param maximizing_player: Boolean, True if maximizing player's turn.
+        :return: The columns to search, in search order
+        """
+        return columns
+
     def evaluate_board(self, game):
-        """Evaluate the board state for intermediate nodes."""
+        """Evaluate the board state for intermediate nodes, through the evaluation cache if there is one."""
+        if self.cache is None:
+            score = self.board_score(game)
+        else:
+            key = ("evaluate_board", self.center_weight, self.four_weight, board_key(game.board))
+            score = self.cache.get_or_compute(key, lambda: self.board_score(game))
+        if self.positional_weight:
+            score += self.positional_weight * self.positional_score(game)
+        return score
+
+    def positional_score(self, game):
+        """
+        BoardHeuristicAI positional score of the board (player 1's discs minus player 2's),
+        read from the incremental PositionalScore during a search.
+        """
+        if self.positional is not None:
+            return self.positional.score
+        return self.heuristic.positional_score(game.board)
+
+    def board_score(self, game):
+        """Heuristic score of the board: center column discs and fours in a row."""
         score = 0
 
         # Center column preference
         center_array = [game.board[r][game.columns // 2] for r in range(game.rows)]
-        score += (center_array.count(1) - center_array.count(2)) * 3
+        score += (center_array.count(1) - center_array.count(2)) * self.center_weight
 
         # Evaluate horizontal, vertical, and diagonal windows
         for r in range(game.rows):
@@ -226,13 +472,203 @@ class MinimaxAIWithPruning:
         """Evaluate a specific window of four cells."""
         score = 0
         if list(window).count(1) == 4:
-            score += 100
+            score += self.four_weight
         elif list(window).count(2) == 4:
-            score -= 100
+            score -= self.four_weight
         return score
 
-    def get_best_move(self, game):
-        """Get the best move using Minimax with alpha-beta pruning."""
-        best_col, _ = self.minimax_with_pruning(game, self.depth, float('-inf'), float('inf'), True)
+    def aspiration_search(self, game, depth, guess, symmetric=False, maximizing_player=True):
+        """
+        Alpha-beta search in a narrow window around a guessed value. When the value falls outside
+        the window it is searched again, with the window opened up on that side.
+        :param game: The Connect4 game instance.
+        :param depth: Depth of the search tree.
+        :param guess: Expected value, e.g. from the previous move or iteration; None searches the full window.
+        :param symmetric: True if the board is its own mirror image; only the left half is searched.
+        :param maximizing_player: Boolean, True if player 1 (the maximizer) is to move at the root.
+        :return: Best column, its value and the number of re-searches.
+        """
+        inf = float('inf')
+        if guess is None or not self.aspiration_window or abs(guess) == inf:
+            best_col, value = self.minimax_with_pruning(game, depth, -inf, inf, maximizing_player, symmetric)
+            return best_col, value, 0
+
+        alpha, beta = guess - self.aspiration_window, guess + self.aspiration_window
+        researches = 0
+        while True:
+            best_col, value = self.minimax_with_pruning(game, depth, alpha, beta, maximizing_player, symmetric)
+            if value <= alpha and alpha > -inf:
+                # Fail low: the value is an upper bound, search everything up to it again
+                alpha, beta = -inf, np.nextafter(value, inf)
+            elif value >= beta and beta < inf:
+                # Fail high: the value is a lower bound, search everything from it again
+                alpha, beta = np.nextafter(value, -inf), inf
+            else:
+                return best_col, value, researches
+            researches += 1
+
+    def memory_usage(self):
+        """Retained state by component (see MemoryProfile)."""
+        usage = self.cache.memory_usage() if self.cache is not None else {}
+        if self.solver is not None:
+            usage.update(self.solver.memory_usage())
+        return usage
+
+    def solve_endgame(self, game):
+        """
+        Pick the move with the best exact score for the player to move.
+        Among wins this is the fastest one, among losses the longest one.
+        :param game: The Connect4 game instance.
+        :return: Best column and its exact score.
+        """
+        scores = self.solver.analyze(Position.from_board(game.board, game.current_player))
+        value = max(score for score in scores if score is not None)
+        best_columns = [col for col, score in enumerate(scores) if score == value]
+        return best_columns[self.rng.integers(len(best_columns))], value
+
+    def get_best_move(self, game, workers=None):
+        """
+        Get the best move for the player to move using Minimax with alpha-beta pruning.
+        Search values are from player 1's point of view: player 1 maximizes, player 2 minimizes.
+        The value in self.stats is for the player to move, like the solver's and MCTS's.
+        :param workers: Search the root columns in parallel with this many processes (kept until close())
+        """
+        maximizing_player = game.current_player == 1
+        if self.endgame_empty_cells is not None:
+            empty_cells = game.rows * game.columns - np.count_nonzero(game.board)
+            if empty_cells <= self.endgame_empty_cells:
+                if self.solver is None:
+                    self.solver = Solver()
+                nodes = self.solver.node_count
+                best_col, value = self.solve_endgame(game)
+                self.last_value = None  # Exact scores are not on the heuristic's scale
+                self.stats = {"value": value, "nodes": self.solver.node_count - nodes, "solved": True}
+                return best_col
+        symmetric = np.array_equal(game.board, game.board[:, ::-1])
+        if workers and self.depth > 1:
+            return split_root(self, game, symmetric, workers)
+        self.nodes = 0
+        guess = self.last_value if self.last_value is None or maximizing_player else -self.last_value
+        best_col, value, researches = self.aspiration_search(game, self.depth, guess, symmetric, maximizing_player)
+        self.last_value = value if maximizing_player else -value
+        self.stats = {"value": self.last_value, "researches": researches, "nodes": self.nodes}
         return best_col
 
+    def close(self):
+        """Stop the root-split worker pool, if any."""
+        close_root_pool(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_ROOT_AGENT = None  # Copy of the searching agent in a root-split worker process
+_ROOT_BOUND = None  # Best root value for the player to move found so far by any worker (alpha-beta agents only)
+
+
+def _init_root_worker(agent, shared_bound):
+    """Pool initializer: keep the agent and the shared bound for every column searched."""
+    global _ROOT_AGENT, _ROOT_BOUND
+    _ROOT_AGENT, _ROOT_BOUND = agent, shared_bound
+
+
+def _search_root_column(board, current_player, depth, col):
+    """
+    Worker entry point: search the player to move dropping its disc into one root column.
+    :return: (value from player 1's point of view, nodes searched or None)
+    """
+    game = Connect4(*board.shape)
+    game.board = board
+    game.current_player = current_player
+    game.board[game.get_next_open_row(col)][col] = current_player
+    agent = _ROOT_AGENT
+    maximizing_player = current_player == 1
+    if _ROOT_BOUND is None:
+        _, value = agent.minimax(game, depth - 1, not maximizing_player)
+        return value, None
+
+    # Start from the best value the other columns have already reached, just short of it so that
+    # a column equal to the best is still searched exactly and kept among the ties
+    inf = float('inf')
+    bound = np.nextafter(_ROOT_BOUND.value, -inf)
+    alpha, beta = (bound, inf) if maximizing_player else (-inf, -bound)
+    agent.nodes = 0
+    _, value = agent.minimax_with_pruning(game, depth - 1, alpha, beta, not maximizing_player)
+    with _ROOT_BOUND.get_lock():
+        _ROOT_BOUND.value = max(_ROOT_BOUND.value, value if maximizing_player else -value)
+    return value, agent.nodes
+
+
+def root_pool(agent, workers):
+    """
+    Process pool of an agent's root-split search, created on first use and kept between moves
+    (the workers keep their copy of the agent, caches included).
+    :return: (ProcessPoolExecutor, shared bound or None)
+    """
+    if agent.root_pool is not None and agent.root_pool_workers != workers:
+        close_root_pool(agent)
+    if agent.root_pool is None:
+        agent.root_bound = Value('d', float('-inf')) if isinstance(agent, MinimaxAIWithPruning) else None
+        agent.root_pool = ProcessPoolExecutor(workers, initializer=_init_root_worker, initargs=(agent, agent.root_bound))
+        agent.root_pool_workers = workers
+    return agent.root_pool, agent.root_bound
+
+
+def close_root_pool(agent):
+    """Shut an agent's root-split pool down."""
+    if agent.root_pool is not None:
+        agent.root_pool.shutdown()
+        agent.root_pool = agent.root_bound = None
+
+
+def split_root(agent, game, symmetric, workers):
+    """
+    Root-split parallel search: every root column is searched in its own worker process.
+    The values are merged like the serial search does, ties broken with the agent's generator,
+    and the agent's stats (and aspiration guess) are set from the merged value.
+    :param agent: MinimaxAI or MinimaxAIWithPruning
+    :param game: The Connect4 game instance.
+    :param symmetric: True if the board is its own mirror image; only the left half is searched.
+    :param workers: Number of worker processes
+    :return: Best column
+    """
+    maximizing_player = game.current_player == 1
+    valid_columns = [c for c in range(game.columns) if game.is_valid_location(c)]
+    if symmetric:
+        valid_columns = [c for c in valid_columns if c <= (game.columns - 1) // 2]  # Mirrored columns score the same
+    pruning = isinstance(agent, MinimaxAIWithPruning)
+    decided = None
+    if pruning and agent.threat_pruning:
+        agent.load_bitboards(game)
+        try:
+            valid_columns, decided = agent.filter_threats(valid_columns, maximizing_player)
+        finally:
+            agent.bitboards = agent.positional = None
+
+    if decided is not None:
+        best_col, value = decided
+        nodes = 1
+    else:
+        pool, shared_bound = root_pool(agent, workers)
+        if shared_bound is not None:
+            shared_bound.value = float('-inf')
+        results = list(pool.map(_search_root_column, repeat(game.board.copy()), repeat(game.current_player),
+                                repeat(agent.depth), valid_columns))
+        values = [value for value, _ in results]
+        value = max(values) if maximizing_player else min(values)
+        best_columns = [col for col, new_score in zip(valid_columns, values) if new_score == value]
+        if symmetric:
+            best_columns += [game.columns - 1 - c for c in best_columns if 2 * c != game.columns - 1]
+        best_col = best_columns[agent.rng.integers(len(best_columns))]  # Randomly choose among the best columns
+        nodes = 1 + sum(node_count for _, node_count in results) if pruning else None
+
+    value = value if maximizing_player else -value  # For the player to move
+    if pruning:
+        agent.last_value = value
+        agent.stats = {"value": value, "researches": 0, "nodes": nodes}
+    else:
+        agent.stats = {"value": value}
+    return best_col
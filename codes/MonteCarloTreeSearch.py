@@ -1,12 +1,25 @@
 import numpy as np
-import random
+from Bitboard import Position
 from Environment import Connect4
+from RandomAgent import RandomAgent
+from Utility import make_rng, game_seed, seed_agents
 
 
 class MCTS:
-    def __init__(self, game, simulations=500):
+    def __init__(self, game, simulations=500, rng=None, cache=None):
+        """
+        :param game: Connect4 game instance the agent plays in
+        :param simulations: Number of random playouts per candidate column
+        :param rng: Seed or numpy Generator driving the playouts
+        :param cache: Optional EvaluationCache pooling the playout results of every visit to a position (and its
+            mirror image): the move is chosen on all of them, so a position met again gets a better estimate rather
+            than a replay of one noisy sample. Every visit still runs its own playouts.
+        """
         self.game = game
         self.simulations = simulations
+        self.rng = make_rng(rng)
+        self.cache = cache
+        self.stats = {}
 
     def simulate(self):
         """Simulate a random game from the current state."""
@@ -16,7 +29,7 @@ class MCTS:
             valid_columns = [c for c in range(self.game.columns) if self.is_valid_location(board_copy, c)]
             if not valid_columns:
                 return 0  # Draw
-            col = random.choice(valid_columns)
+            col = valid_columns[self.rng.integers(len(valid_columns))]
             row = self.get_next_open_row(board_copy, col)
             board_copy[row][col] = current_player
             if self.check_winner(board_copy, current_player):
@@ -25,20 +38,56 @@ class MCTS:
 
     def get_best_move(self):
         """Get the best move using Monte Carlo simulations."""
+        scores = self.playout_scores()
+        playouts = self.simulations
+        if self.cache is not None:
+            scores, playouts = self.pooled_scores(scores)
+        best_col = max(scores, key=scores.get)
+        self.stats = {"value": scores[best_col] / playouts}  # Mean playout result, for the player to move
+        return best_col
+
+    def pooled_scores(self, scores):
+        """
+        Add this visit's playout scores to those of earlier visits in the cache.
+        :return: (summed scores of every column, playouts per column)
+        """
+        position = Position.from_board(self.game.board, self.game.current_player)
+        # Entries are stored in the canonical orientation, relative to the player to move
+        last = self.game.columns - 1
+        stored_col = (lambda col: last - col) if position.mirror_key() < position.key() else (lambda col: col)
+        key = ("mcts", self.game.board.shape, position.canonical_key())
+        entry = self.cache.get(key)
+        playouts = self.simulations
+        if entry is not None:
+            scores = {col: score + entry[0][stored_col(col)] for col, score in scores.items()}
+            playouts += entry[1]
+        self.cache.put(key, ({stored_col(col): score for col, score in scores.items()}, playouts))
+        return scores, playouts
+
+    def memory_usage(self):
+        """Retained state by component (see MemoryProfile)."""
+        return self.cache.memory_usage() if self.cache is not None else {}
+
+    def playout_scores(self):
+        """Sum of the playout results of every valid column."""
         valid_columns = [c for c in range(self.game.columns) if self.game.is_valid_location(c)]
         scores = {col: 0 for col in valid_columns}
+        symmetric = np.array_equal(self.game.board, self.game.board[:, ::-1])
         for col in valid_columns:
+            if symmetric and col > (self.game.columns - 1) // 2:
+                scores[col] = scores[self.game.columns - 1 - col]  # Mirror of a column already simulated
+                continue
             for _ in range(self.simulations):
                 board_copy = self.game.board.copy()
                 row = self.get_next_open_row(board_copy, col)
                 board_copy[row][col] = self.game.current_player
                 result = self.simulate()
                 scores[col] += result
-        return max(scores, key=scores.get)
+        return scores
 
     def is_valid_location(self, board, col):
         """Check if the column has at least one open slot."""
-        return board[5][col] == 0
+        return board[-1][col] == 0  # Top row
 
     def get_next_open_row(self, board, col):
         """Find the next open row in the specified column."""
@@ -81,8 +130,12 @@ class MCTS:
             self.game.switch_player()
         return node
 
-def run_mcts_simulations(num_games, simulations_per_game):
-    """Run multiple games to test the winning rate of MCTS."""
+def run_mcts_simulations(num_games, simulations_per_game, seed=None, worker_id=0):
+    """
+    Run multiple games to test the winning rate of MCTS.
+    :param seed: Tournament seed; each game derives its own seed from it
+    :param worker_id: Index of the worker running these games
+    """
     mcts_wins = 0
     player2_wins = 0
     draws = 0
@@ -91,6 +144,8 @@ def run_mcts_simulations(num_games, simulations_per_game):
         print(f"\nGame {game_num + 1}")
         game = Connect4()
         mcts = MCTS(game, simulations=simulations_per_game)
+        opponent = RandomAgent()
+        seed_agents([mcts, opponent], game_seed(seed, game_num, worker_id))
 
         while not game.game_over:
             game.print_board()
@@ -99,8 +154,7 @@ def run_mcts_simulations(num_games, simulations_per_game):
                 col = mcts.get_best_move()
                 print(f"Player 1 (MCTS) chooses column: {col}")
             else:  # Player 2 (Random)
-                valid_columns = [c for c in range(game.columns) if game.is_valid_location(c)]
-                col = random.choice(valid_columns)
+                col = opponent.get_move(game)
                 print(f"Player 2 (Random) chooses column: {col}")
 
             game.drop_piece(col)
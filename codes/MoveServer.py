@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import json
+import socket
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from Analyze import parse_position, score_fields
+from SelfPlay import make_agent
+from Utility import request_move
+
+# Protocol: one JSON object per line in each direction. A request holds
+#   "position": move string or board encoding (see Analyze.parse_position), "" or "-" for the start position,
+#   "agent": agent and budget such as "pruning:6" or "mcts:500" (default "pruning:4"),
+#   "session": name of the client's session (default "default"),
+#   "op": "move" (default), "close" to drop the session, or "stats",
+#   "id": any value, echoed in the response.
+# Responses may arrive out of order when a client sends several requests without waiting. Scores are for the side
+# to move, with proven wins and losses written as in Analyze.score_fields. A request that fails gets an "error".
+# Searches run on worker threads so that the event loop keeps reading, batching and answering meanwhile; the
+# searches are pure Python, so under the GIL they are only interleaved, not run in parallel.
+
+BATCHED_AGENTS = ("board", "feature")  # Heuristic agents whose evaluations are batched across requests
+
+
+class Session:
+    """Agents of one client session, kept warm (tables, books, caches) between requests."""
+
+    def __init__(self):
+        self.agents = {}
+        self.lock = asyncio.Lock()  # One search at a time per session
+        self.requests = 0
+
+    def agent(self, spec):
+        if spec not in self.agents:
+            self.agents[spec] = make_agent(spec)
+        return self.agents[spec]
+
+
+class HeuristicBatcher:
+    """Collects concurrent requests for one heuristic agent and scores them in a single vectorized call."""
+
+    def __init__(self, spec, max_batch=256, max_delay=0.002):
+        """
+        :param spec: "board" or "feature"
+        :param max_batch: Flush as soon as this many positions are waiting
+        :param max_delay: Seconds the first waiting position waits for others
+        """
+        self.spec = spec
+        self.agent = make_agent(spec)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending = []
+        self.timer = None
+        self.batches = 0
+        self.positions = 0
+
+    async def best_move(self, game):
+        """Queue a position; returns (best column, its score) once its batch has been scored."""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((game.board.copy(), game.current_player, future))
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.max_delay, self.flush)
+        return await future
+
+    def flush(self):
+        """Score every waiting position at once and resolve their futures."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        boards = np.stack([board for board, _, _ in batch])
+        if self.spec == "board":
+            scores = self.agent.score_positions(boards)
+        else:
+            scores = self.agent.score_positions(boards, [player for _, player, _ in batch])
+        for (_, _, future), row in zip(batch, scores):
+            best_columns = np.flatnonzero(row == row.max())
+            col = int(best_columns[self.agent.rng.integers(len(best_columns))])  # Random tie-breaking, as the agents do
+            if not future.cancelled():
+                future.set_result((col, float(row[col])))
+        self.batches += 1
+        self.positions += len(batch)
+
+
+class MoveServer:
+    """Answers move requests over TCP or a Unix socket, keeping engines warm per session."""
+
+    def __init__(self, max_sessions=64, workers=None, max_batch=256, batch_delay=0.002):
+        """
+        :param max_sessions: Sessions kept at most; the least recently used one is dropped beyond that
+        :param workers: Threads running searches; searches of different sessions interleave on them but do not
+            run in parallel (GIL), so more threads add fairness between sessions, not throughput
+        :param max_batch: Largest batch of heuristic evaluations
+        :param batch_delay: Seconds a heuristic request waits for others to batch with
+        """
+        self.sessions = OrderedDict()
+        self.max_sessions = max_sessions
+        self.executor = ThreadPoolExecutor(workers)
+        self.batchers = {spec: HeuristicBatcher(spec, max_batch, batch_delay) for spec in BATCHED_AGENTS}
+
+    def session(self, name):
+        """Get a session, creating it (and evicting the least recently used one if needed)."""
+        if name in self.sessions:
+            self.sessions.move_to_end(name)
+        else:
+            self.sessions[name] = Session()
+            if len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        return self.sessions[name]
+
+    async def handle_request(self, request):
+        """Answer one request; returns the response dict."""
+        response = {"id": request.get("id")}
+        op = request.get("op", "move")
+        name = str(request.get("session", "default"))
+        if op == "close":
+            response["closed"] = self.sessions.pop(name, None) is not None
+            return response
+        if op == "stats":
+            response["sessions"] = len(self.sessions)
+            response["batches"] = {spec: {"batches": batcher.batches, "positions": batcher.positions}
+                                   for spec, batcher in self.batchers.items()}
+            return response
+        if op != "move":
+            response["error"] = f"Unknown op {op!r}."
+            return response
+
+        try:
+            game = parse_position(str(request["position"]))
+            spec = request.get("agent", "pruning:4")
+            start_time = time.perf_counter()
+            if spec in self.batchers:
+                col, score = await self.batchers[spec].best_move(game)
+                response["best_move"] = col
+                response.update(score_fields(score))
+            else:
+                session = self.session(name)
+                async with session.lock:
+                    agent = session.agent(spec)
+                    col = await asyncio.get_running_loop().run_in_executor(self.executor, request_move, agent, game)
+                    session.requests += 1
+                    stats = getattr(agent, "stats", {})
+                response["best_move"] = int(col)
+                response.update(score_fields(stats.get("value")))
+                response["nodes"] = stats.get("nodes")
+            response["time"] = time.perf_counter() - start_time
+        except (KeyError, ValueError) as error:
+            response["error"] = f"Bad request: {error}"
+        return response
+
+    async def handle_client(self, reader, writer):
+        """Serve one connection; requests are handled concurrently so that they can be batched."""
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line):
+            request = None
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("a request must be a JSON object")
+                response = await self.handle_request(request)
+            except json.JSONDecodeError as error:
+                response = {"error": f"Invalid JSON: {error}"}
+            except ValueError as error:
+                response = {"error": f"Bad request: {error}"}
+            except Exception as error:  # Agent failures too: the client always gets an answer
+                response = {"id": request.get("id") if isinstance(request, dict) else None,
+                            "error": f"Internal error: {type(error).__name__}: {error}"}
+            async with write_lock:
+                writer.write((json.dumps(response, allow_nan=False) + "\n").encode())
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, path=None):
+        """Serve forever on a TCP port, or on a Unix socket if a path is given."""
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle_client, path=path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+class MoveClient:
+    """Minimal blocking client, e.g. for the GUI or bots."""
+
+    def __init__(self, host="127.0.0.1", port=8765, path=None, session="default"):
+        if path is not None:
+            self.socket = socket.socket(socket.AF_UNIX)
+            self.socket.connect(path)
+        else:
+            self.socket = socket.create_connection((host, port))
+        self.file = self.socket.makefile("rw")
+        self.session = session
+
+    def best_move(self, position, agent="pruning:4"):
+        """Ask for the best move of a position; returns the response dict."""
+        self.file.write(json.dumps({"position": position, "agent": agent, "session": self.session}) + "\n")
+        self.file.flush()
+        return json.loads(self.file.readline())
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Connect-4 moves over a local socket (JSON lines).")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--unix", default=None, help="Serve on this Unix socket path instead of TCP")
+    parser.add_argument("--max-sessions", type=int, default=64, help="Sessions kept warm at most")
+    parser.add_argument("--workers", type=int, default=None, help="Search threads (interleaved, not parallel)")
+    args = parser.parse_args()
+
+    asyncio.run(MoveServer(args.max_sessions, args.workers).serve(args.host, args.port, args.unix))
@@ -0,0 +1,251 @@
+import argparse
+import mmap
+import os
+import struct
+from multiprocessing import Pool
+
+import numpy as np
+from Bitboard import Position, WIDTH, HEIGHT, CENTER_ORDER, column_mask, mirror
+from MemoryProfile import retained_memory
+from Solver import SolverSearch
+from Utility import request_move
+
+# File layout: header, then the sorted keys (uint64), the scores (int16) and the moves (uint8),
+# each stored contiguously so the key array can be binary-searched in place.
+# Keys are canonical: a position and its mirror image share one entry, stored for the
+# orientation whose key is smaller.
+MAGIC = b"C4OB"
+VERSION = 2
+HEADER = struct.Struct("<4sHBBBxxxI")  # magic, version, width, height, ply, padding, entry count
+WIN_SCORE = 1000  # Search scores above WIN_SCORE - WIDTH * HEIGHT are forced wins
+
+
+class BookSearch:
+    """Depth-limited negamax used to pick book moves."""
+
+    def __init__(self, depth=8):
+        """
+        :param depth: Search depth in plies
+        """
+        self.depth = depth
+
+    def __call__(self, position):
+        """
+        Search a position.
+        :param position: Bitboard Position, with the side to move not already winning
+        :return: (best column, score for the side to move)
+        """
+        best_col, best_score = None, -WIN_SCORE - 1
+        alpha, beta = -WIN_SCORE, WIN_SCORE
+        for col in CENTER_ORDER:
+            if not position.can_play(col):
+                continue
+            if position.is_winning_move(col):
+                return col, WIN_SCORE - position.moves - 1
+            child = position.copy()
+            child.play_col(col)
+            score = -self.negamax(child, self.depth - 1, -beta, -alpha)
+            if score > best_score:
+                best_col, best_score = col, score
+                alpha = max(alpha, score)
+        return best_col, best_score
+
+    def negamax(self, position, depth, alpha, beta):
+        """Negamax with alpha-beta pruning, from the point of view of the side to move."""
+        if position.moves == WIDTH * HEIGHT:
+            return 0  # Draw
+        possible = position.possible()
+        if position.winning_position() & possible:
+            return WIN_SCORE - position.moves - 1
+        if depth <= 0:
+            return self.evaluate(position)
+
+        value = -WIN_SCORE
+        for col in CENTER_ORDER:
+            move = possible & column_mask(col)
+            if not move:
+                continue
+            child = Position(position.current_position, position.mask, position.moves)
+            child.play(move)
+            value = max(value, -self.negamax(child, depth - 1, -beta, -alpha))
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+        return value
+
+    def evaluate(self, position):
+        """Leaf score: open winning cells of the side to move minus the opponent's."""
+        return position.winning_position().bit_count() - position.opponent_winning_position().bit_count()
+
+
+def enumerate_positions(ply):
+    """
+    Collect every distinct non-terminal position with fewer than `ply` discs, one per mirror pair.
+    :return: List of Positions, each in its canonical orientation
+    """
+    frontier = {Position().key(): Position()}
+    positions = []
+    for _ in range(ply):
+        positions.extend(frontier.values())
+        next_frontier = {}
+        for position in frontier.values():
+            for col in range(WIDTH):
+                if position.can_play(col) and not position.is_winning_move(col):
+                    child = position.copy()
+                    child.play_col(col)
+                    if child.key() == child.canonical_key():
+                        next_frontier[child.key()] = child
+                    else:  # Keep the mirror image, which has the smaller key
+                        mirrored = Position(mirror(child.current_position), mirror(child.mask), child.moves)
+                        next_frontier[mirrored.key()] = mirrored
+        frontier = next_frontier
+    return [position for position in positions if position.moves < WIDTH * HEIGHT]
+
+
+def _search_position(args):
+    """Worker entry point: search one position and return its book entry."""
+    search, current_position, mask, moves = args
+    position = Position(current_position, mask, moves)
+    col, score = search(position)
+    return position.key(), col, score
+
+
+def build_opening_book(path, ply, search=None, workers=1):
+    """
+    Search every position up to a ply and write the opening book file.
+    :param path: Output file
+    :param ply: Positions with fewer discs than this get a book entry
+    :param search: Callable mapping a Position to (best column, score); defaults to BookSearch()
+    :param workers: Number of processes to search with
+    :return: Number of entries written
+    """
+    search = search if search is not None else BookSearch()
+    jobs = [(search, p.current_position, p.mask, p.moves) for p in enumerate_positions(ply)]
+    if workers > 1:
+        with Pool(workers) as pool:
+            entries = pool.map(_search_position, jobs, chunksize=16)
+    else:
+        entries = [_search_position(job) for job in jobs]
+
+    entries.sort()
+    keys = np.array([key for key, _, _ in entries], dtype="<u8")
+    scores = np.array([np.clip(score, -32768, 32767) for _, _, score in entries], dtype="<i2")
+    moves = np.array([col for _, col, _ in entries], dtype="u1")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, WIDTH, HEIGHT, ply, len(entries)))
+        f.write(keys.tobytes())
+        f.write(scores.tobytes())
+        f.write(moves.tobytes())
+    return len(entries)
+
+
+class OpeningBook:
+    """
+    Read-only opening book, memory-mapped so worker processes share one copy of the file.
+    A pickled book holds only its path: the worker process maps the file again.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Book file written by build_opening_book
+        :raises ValueError: If the file is not a book for this board size
+        """
+        self.path = os.path.abspath(path)
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, width, height, self.ply, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an opening book file.")
+        if (width, height) != (WIDTH, HEIGHT):
+            raise ValueError(f"{path} was built for a {width}x{height} board.")
+        offset = HEADER.size
+        self.keys = np.frombuffer(self._mmap, dtype="<u8", count=count, offset=offset)
+        offset += 8 * count
+        self.scores = np.frombuffer(self._mmap, dtype="<i2", count=count, offset=offset)
+        offset += 2 * count
+        self.moves = np.frombuffer(self._mmap, dtype="u1", count=count, offset=offset)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __reduce__(self):
+        return OpeningBook, (self.path,)
+
+    def memory_usage(self):
+        """Size of the mapped file and number of positions (see MemoryProfile)."""
+        return {"bytes": len(self._mmap), "entries": len(self)}
+
+    def lookup(self, position):
+        """
+        Binary-search the book for a position.
+        :param position: Bitboard Position
+        :return: (best column, score) or None when the position is not in the book
+        """
+        if position.moves >= self.ply or position.layout is not Position.layout:  # Books are for the standard board
+            return None
+        key = position.key()
+        mirror_key = mirror(key)
+        flipped = mirror_key < key
+        if flipped:
+            key = mirror_key
+        index = int(np.searchsorted(self.keys, key))
+        if index < len(self.keys) and self.keys[index] == key:
+            col = int(self.moves[index])
+            return (WIDTH - 1 - col if flipped else col), int(self.scores[index])
+        return None
+
+
+class OpeningBookAgent:
+    """Plays book moves while the position is in the book, then defers to another agent."""
+
+    def __init__(self, fallback, book):
+        """
+        :param fallback: Agent used outside the book (e.g. MinimaxAIWithPruning or MCTS)
+        :param book: OpeningBook instance or path to a book file
+        """
+        self.fallback = fallback
+        self.book = book if isinstance(book, OpeningBook) else OpeningBook(book)
+        self.book_hits = 0
+        self.stats = {}
+
+    @property
+    def rng(self):
+        """The fallback agent's generator: seeding the wrapper (e.g. with seed_agents) seeds the fallback."""
+        return self.fallback.rng
+
+    @rng.setter
+    def rng(self, rng):
+        self.fallback.rng = rng
+
+    def memory_usage(self):
+        """Retained state by component (see MemoryProfile); the book is memory-mapped and shared."""
+        usage = dict(retained_memory(self.fallback))
+        usage["opening_book"] = self.book.memory_usage()
+        return usage
+
+    def get_best_move(self, game):
+        """Get the book move if there is one, otherwise the fallback agent's move."""
+        entry = self.book.lookup(Position.from_board(game.board, game.current_player))
+        if entry is not None and game.is_valid_location(entry[0]):
+            self.book_hits += 1
+            self.stats = {"value": entry[1], "nodes": 0, "book": True}  # Book score, for the player to move
+            return entry[0]
+        col = request_move(self.fallback, game)
+        self.stats = getattr(self.fallback, "stats", {})
+        return col
+
+    get_move = get_best_move
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a Connect-4 opening book.")
+    parser.add_argument("output", help="Book file to write")
+    parser.add_argument("--ply", type=int, default=6, help="Store positions with fewer discs than this")
+    parser.add_argument("--depth", type=int, default=8, help="Search depth per position")
+    parser.add_argument("--workers", type=int, default=1, help="Number of search processes")
+    parser.add_argument("--solve", action="store_true", help="Store exact solver scores instead of searching to --depth")
+    args = parser.parse_args()
+
+    search = SolverSearch() if args.solve else BookSearch(args.depth)
+    count = build_opening_book(args.output, args.ply, search, args.workers)
+    print(f"Wrote {count} positions to {args.output}")
@@ -0,0 +1,294 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from Environment import Connect4
+from Minimax_variations import MinimaxAIWithPruning
+from Utility import make_rng
+
+# Entry flags: the stored value is exact, a lower bound (fail high) or an upper bound (fail low)
+EXACT, LOWER, UPPER = 0, 1, 2
+INF_CODE = 2 ** 31 - 1  # Encoded +inf; -inf is -INF_CODE
+KEY_MODULUS = 2 ** 64 - 59  # Prime that keys of boards too large for 64-bit keys are folded with
+
+
+class SearchTimeout(Exception):
+    """Raised inside a worker when its time budget runs out mid-iteration."""
+
+
+class SharedTranspositionTable:
+    """
+    Lock-free transposition table in shared memory, shared by all search processes.
+    Every slot holds two uint64 words: the packed entry and the entry XOR its key. A reader
+    only trusts a slot when the XOR gives back the key it looks for, so entries torn by
+    concurrent writers are simply treated as missing.
+    """
+
+    def __init__(self, size, name=None):
+        """
+        :param size: Number of slots
+        :param name: Name of an existing table to attach to; None creates a new one
+        """
+        self.size = size
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=16 * size)
+        if not self.owner:
+            # The creating process owns the segment; don't let this process' exit unlink it
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        words = np.ndarray((2, size), dtype=np.uint64, buffer=self.shm.buf)
+        if self.owner:
+            words[:] = 0
+        self.checks, self.data = words[0], words[1]
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def probe(self, key):
+        """
+        Look a key up.
+        :return: (value, depth, flag, move) or None when the key is missing
+        """
+        index = key % self.size
+        data = int(self.data[index])
+        if int(self.checks[index]) ^ data != key:
+            return None
+        code = (data & 0xFFFFFFFF) - 2 ** 31
+        value = float('inf') if code == INF_CODE else float('-inf') if code == -INF_CODE else code
+        move = (data >> 42) & 0xFF
+        return value, (data >> 32) & 0xFF, (data >> 40) & 0x3, move - 1 if move else None
+
+    def store(self, key, value, depth, flag, move):
+        """Store an entry, always replacing the previous occupant of the slot."""
+        if value == float('inf'):
+            code = INF_CODE
+        elif value == float('-inf'):
+            code = -INF_CODE
+        else:
+            code = max(-INF_CODE + 1, min(INF_CODE - 1, int(value)))
+        data = (code + 2 ** 31) | (depth << 32) | (flag << 40) | ((move + 1 if move is not None else 0) << 42)
+        index = key % self.size
+        self.data[index] = data
+        self.checks[index] = data ^ key
+
+    def memory_usage(self):
+        """Size of the table and number of filled slots (see MemoryProfile)."""
+        return {"bytes": 16 * self.size, "entries": int(np.count_nonzero(self.checks))}
+
+    def clear(self):
+        self.checks[:] = 0
+        self.data[:] = 0
+
+    def close(self):
+        """Detach from the table, and free it if this process created it."""
+        self.checks = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class LazySMPWorker(MinimaxAIWithPruning):
+    """Alpha-beta searcher of one Lazy SMP process, reading and filling the shared table."""
+
+    def __init__(self, depth, worker_id, table, time_limit=None, rng=None, threat_pruning=False,
+                 aspiration_window=None, quiescence_depth=0):
+        """
+        :param depth: Deepest iteration to search
+        :param worker_id: Index of the worker, used to vary its move ordering
+        :param table: SharedTranspositionTable
+        :param time_limit: Seconds after which the current iteration is abandoned
+        :param rng: Seed or numpy Generator used for tie-breaking
+        :param threat_pruning: See MinimaxAIWithPruning
+        :param aspiration_window: Half-width of the window searched around the previous iteration's value
+        :param quiescence_depth: See MinimaxAIWithPruning
+        """
+        super().__init__(depth, rng=rng, threat_pruning=threat_pruning, aspiration_window=aspiration_window,
+                         quiescence_depth=quiescence_depth)
+        self.worker_id = worker_id
+        self.table = table
+        self.deadline = time.monotonic() + time_limit if time_limit is not None else None
+
+    def table_key(self, maximizing_player):
+        """
+        Key of the current search node, shared with its mirror image.
+        Keys of large boards do not fit in a table word: they are folded to 64 bits, which
+        (as with any hashed key) lets distinct positions collide, rarely.
+        :return: (key, True if the node is stored mirrored)
+        """
+        key = self.bitboards[0] + self.bitboards[1]
+        mirrored = self.layout.mirror(key)
+        flipped = mirrored < key
+        key = (min(key, mirrored) << 1 | maximizing_player) + 1
+        if key >> 64:
+            key = key % KEY_MODULUS + 1
+        return key, flipped
+
+    def minimax_with_pruning(self, game, depth, alpha, beta, maximizing_player, symmetric=False):
+        """Alpha-beta search of MinimaxAIWithPruning, wrapped with shared-table probes and stores."""
+        if self.bitboards is None:  # Root call: let the base class build the bitboards first
+            return super().minimax_with_pruning(game, depth, alpha, beta, maximizing_player, symmetric)
+
+        if self.deadline is not None and self.nodes % 1024 == 0 and time.monotonic() > self.deadline:
+            raise SearchTimeout
+
+        key, flipped = self.table_key(maximizing_player)
+        entry = self.table.probe(key)
+        if entry is not None:
+            value, entry_depth, flag, move = entry
+            if entry_depth >= depth and (move is not None or depth == 0):
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    if move is not None and flipped:
+                        move = self.layout.width - 1 - move
+                    return move, value
+
+        best_col, value = super().minimax_with_pruning(game, depth, alpha, beta, maximizing_player, symmetric)
+        flag = UPPER if value <= alpha else LOWER if value >= beta else EXACT
+        stored_move = self.layout.width - 1 - best_col if best_col is not None and flipped else best_col
+        self.table.store(key, value, depth, flag, stored_move)
+        return best_col, value
+
+    def order_columns(self, columns, maximizing_player):
+        """Search the table's best move first; helper workers also bring one other column forward."""
+        if not columns:
+            return columns
+        ordered = list(columns)
+        if self.worker_id:
+            ordered.insert(0, ordered.pop(self.worker_id % len(ordered)))
+        key, flipped = self.table_key(maximizing_player)
+        entry = self.table.probe(key)
+        if entry is not None and entry[3] is not None:
+            move = self.layout.width - 1 - entry[3] if flipped else entry[3]
+            if move in ordered:
+                ordered.remove(move)
+                ordered.insert(0, move)
+        return ordered
+
+    def iterative_deepening(self, game):
+        """
+        Search depth 1, 2, ... up to self.depth until the time limit runs out.
+        The first iteration always completes so there is a move to return.
+        :return: (deepest completed depth, best column, value from player 1's point of view, nodes searched,
+            re-searches)
+        """
+        symmetric = np.array_equal(game.board, game.board[:, ::-1])
+        completed = (0, None, None)
+        total_researches = 0
+        deadline, self.deadline = self.deadline, None
+        for depth in range(1, self.depth + 1):
+            try:
+                best_col, value, researches = self.aspiration_search(game, depth, completed[2], symmetric,
+                                                                     game.current_player == 1)
+            except SearchTimeout:
+                break
+            finally:
+                self.bitboards = self.positional = None
+            completed = (depth, best_col, value)
+            total_researches += researches
+            self.deadline = deadline
+        return completed + (self.nodes, total_researches)
+
+
+_TABLE = None  # Shared table of the current worker process
+
+
+def _attach_table(name, size):
+    """Pool initializer: attach the worker process to the shared table."""
+    global _TABLE
+    if _TABLE is None or _TABLE.name != name:
+        _TABLE = SharedTranspositionTable(size, name=name)
+
+
+def _search_worker(board, current_player, depth, worker_id, time_limit, threat_pruning, aspiration_window,
+                   quiescence_depth, seed):
+    """Worker entry point: run one Lazy SMP searcher on the root position."""
+    game = Connect4(*board.shape)
+    game.board = board
+    game.current_player = current_player
+    worker = LazySMPWorker(depth, worker_id, _TABLE, time_limit, rng=seed, threat_pruning=threat_pruning,
+                           aspiration_window=aspiration_window, quiescence_depth=quiescence_depth)
+    return worker.iterative_deepening(game)
+
+
+class LazySMPMinimax:
+    """
+    Parallel alpha-beta: several processes run iterative deepening on the same root with
+    different move orderings (and every other one a ply deeper), sharing one lock-free
+    transposition table. The deepest completed result is played.
+    """
+
+    def __init__(self, depth, workers=4, rng=None, table_size=1 << 20, time_limit=None, threat_pruning=False,
+                 aspiration_window=None, quiescence_depth=0):
+        """
+        :param depth: Search depth of the even-numbered workers; odd ones search one ply deeper
+        :param workers: Number of search processes
+        :param rng: Seed or numpy Generator the workers' seeds are drawn from
+        :param table_size: Number of shared transposition table slots (16 bytes each)
+        :param time_limit: Optional seconds per move; workers stop deepening when it runs out
+        :param threat_pruning: See MinimaxAIWithPruning
+        :param aspiration_window: See LazySMPWorker
+        :param quiescence_depth: See MinimaxAIWithPruning
+        """
+        self.depth = depth
+        self.workers = workers
+        self.rng = make_rng(rng)
+        self.table_size = table_size
+        self.time_limit = time_limit
+        self.threat_pruning = threat_pruning
+        self.aspiration_window = aspiration_window
+        self.quiescence_depth = quiescence_depth
+        self.table = None
+        self.pool = None
+        self.stats = {}
+
+    def __getstate__(self):
+        # Copies get neither the pool nor the shared table: they start their own on their first move
+        return dict(self.__dict__, table=None, pool=None)
+
+    def start(self):
+        """Create the shared table and the worker pool; called on the first move."""
+        if self.pool is None:
+            global _TABLE
+            self.table = SharedTranspositionTable(self.table_size)
+            _TABLE = self.table  # Forked workers inherit the mapping directly
+            self.pool = ProcessPoolExecutor(self.workers, initializer=_attach_table,
+                                            initargs=(self.table.name, self.table_size))
+
+    def get_best_move(self, game):
+        """Get the deepest completed best move of all workers."""
+        self.start()
+        seeds = self.rng.integers(2 ** 63, size=self.workers)
+        futures = [
+            self.pool.submit(_search_worker, game.board.copy(), game.current_player, self.depth + worker_id % 2,
+                             worker_id, self.time_limit, self.threat_pruning, self.aspiration_window,
+                             self.quiescence_depth, int(seeds[worker_id]))
+            for worker_id in range(self.workers)
+        ]
+        results = [future.result() for future in futures]
+        depth, best_col, value, _, _ = max(results, key=lambda result: result[0])  # Lowest worker id wins ties
+        value = value if game.current_player == 1 else -value  # For the player to move, as the other agents report
+        self.stats = {"depth": depth, "value": value, "nodes": sum(result[3] for result in results),
+                      "researches": sum(result[4] for result in results)}
+        return best_col
+
+    def memory_usage(self):
+        """Retained state by component (see MemoryProfile); the shared table lives in shared memory."""
+        return {"shared_table": self.table.memory_usage()} if self.table is not None else {}
+
+    def close(self):
+        """Stop the worker pool and free the shared table."""
+        global _TABLE
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.table is not None:
+            if _TABLE is self.table:
+                _TABLE = None
+            self.table.close()
+            self.table = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,12 +1,17 @@
-import random
+from Utility import make_rng
 
 class RandomAgent:
-    @staticmethod
-    def get_move(game):
+    def __init__(self, rng=None):
+        """
+        :param rng: Seed or numpy Generator used to pick the moves
+        """
+        self.rng = make_rng(rng)
+
+    def get_move(self, game):
         """
         Choose a random valid column for the current player.
         :param game: Connect4 game instance
         :return: Column index of the move
         """
         valid_columns = [c for c in range(game.columns) if game.is_valid_location(c)]
-        return random.choice(valid_columns)
+        return valid_columns[self.rng.integers(len(valid_columns))]
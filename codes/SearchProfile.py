@@ -0,0 +1,240 @@
+import argparse
+import cProfile
+import os
+import pstats
+import re
+import signal
+import sys
+import time
+from collections import Counter, defaultdict
+
+from Environment import Connect4
+from SelfPlay import AGENT_TYPES, make_agent
+from Utility import game_seed, request_move, seed_agents
+
+# Collapsed stack format (flamegraph.pl, speedscope, inferno): one line per distinct stack,
+#   "<agent>;<outermost frame>;...;<innermost frame> <samples>"
+# with frames written as "Class.function (File.py:line)". Stacks start at the agent's get_move/get_best_move call.
+
+MODES = ("sample", "cprofile")
+
+
+def frame_label(code):
+    """Flame graph label of a code object."""
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def stats_label(function):
+    """Label of a pstats function key (file, line, name), in the same form as frame_label."""
+    filename, line, name = function
+    if filename == "~":  # Built-in functions and C methods, e.g. NumPy indexing helpers
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+class SearchProfiler:
+    """
+    Opt-in CPU profile of agent searches, kept per agent.
+    "sample" mode interrupts the search every `interval` seconds of CPU time (SIGPROF) and records the Python stack,
+    costing a few percent; it gives collapsed stacks for flame graphs. Time spent inside NumPy or other C code is
+    charged to the Python function that called it. "cprofile" mode traces every call with cProfile instead: exact
+    call counts and built-in functions (NumPy indexing included) show up, but searches run about twice as slow.
+    Only the calling process is profiled, so LazySMP and split-root workers do not show up.
+    The sampling timer is started by the first search and keeps running until close(), with the samples taken
+    between searches dropped, so that searches shorter than the interval still add up to samples.
+    """
+
+    def __init__(self, mode="sample", interval=0.005, top=15):
+        """
+        :param mode: "sample" or "cprofile"
+        :param interval: Seconds of CPU time between samples ("sample" mode); the kernel may merge ticks much
+            shorter than its clock tick (often 4 ms), which only lowers the number of samples
+        :param top: Rows of the hot function tables
+        :raises ValueError: If the mode is unknown, or sampling is not available on this platform
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}; choose from {', '.join(MODES)}.")
+        if mode == "sample" and not hasattr(signal, "setitimer"):
+            raise ValueError("Sampling needs signal.setitimer (not available on Windows); use mode='cprofile'.")
+        self.mode = mode
+        self.interval = interval
+        self.top = top
+        self.stacks = defaultdict(Counter)  # Agent name -> Counter of collapsed stacks ("sample" mode)
+        self.profiles = {}  # Agent name -> cProfile.Profile ("cprofile" mode)
+        self.cpu_time = Counter()  # Agent name -> CPU seconds spent in profiled searches
+        self.start_time = 0.0
+        self.labels = {}  # Code object -> frame label
+        self.current = None  # Agent being profiled
+        self.base_frame = None  # Frame of the caller of start(): stacks stop there
+        self.previous_handler = None
+        self.timing = False  # Sampling timer running
+
+    def start(self, name):
+        """
+        Call right before an agent starts searching (from the main thread in "sample" mode).
+        :param name: Name the agent's samples are filed under
+        """
+        self.current = name
+        self.start_time = time.process_time()
+        if self.mode == "cprofile":
+            self.profiles.setdefault(name, cProfile.Profile()).enable()
+            return
+        self.base_frame = sys._getframe(1)
+        if not self.timing:  # First search since creation or close(): start the timer
+            self.timing = True
+            self.previous_handler = signal.signal(signal.SIGPROF, self.sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        """Call right after the agent returned its move."""
+        if self.mode == "cprofile":
+            self.profiles[self.current].disable()
+        self.cpu_time[self.current] += time.process_time() - self.start_time
+        self.current = None
+        self.base_frame = None
+
+    def close(self):
+        """Stop the sampling timer and restore the previous SIGPROF handler; a later start() restarts them."""
+        if self.timing:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self.previous_handler)
+            self.timing = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def sample(self, signum, frame):
+        """SIGPROF handler: file the interrupted stack under the current agent (dropped between searches)."""
+        if self.current is None:
+            return
+        labels = self.labels
+        stack = []
+        while frame is not None and frame is not self.base_frame:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = frame_label(code)
+            stack.append(label)
+            frame = frame.f_back
+        stack.append(self.current)
+        self.stacks[self.current][";".join(reversed(stack))] += 1
+
+    def agents(self):
+        """Names of the profiled agents, in order of appearance."""
+        return list(self.cpu_time)
+
+    def hot_functions(self, name, n=None):
+        """
+        Functions an agent spent the most time in.
+        :param name: Agent name
+        :param n: Rows returned (default: the profiler's top)
+        :return: List of (function, self seconds, total seconds, calls) by decreasing self time; in "sample" mode
+            the times share out the agent's CPU time by sample counts and calls are None
+        """
+        n = self.top if n is None else n
+        if self.mode == "cprofile":
+            stats = pstats.Stats(self.profiles[name]).stats
+            rows = [(stats_label(function), tottime, cumtime, calls)
+                    for function, (_, calls, tottime, cumtime, _) in stats.items()]
+        else:
+            own, total = Counter(), Counter()
+            for stack, count in self.stacks[name].items():
+                frames = stack.split(";")[1:]
+                if frames:
+                    own[frames[-1]] += count
+                for label in set(frames):  # Recursive functions count once per sample
+                    total[label] += count
+            seconds = self.cpu_time[name] / (sum(self.stacks[name].values()) or 1)  # CPU time per sample
+            rows = [(label, own[label] * seconds, count * seconds, None) for label, count in total.items()]
+        return sorted(rows, key=lambda row: row[1], reverse=True)[:n]
+
+    def print_top(self, n=None):
+        """Print the hot function table of every agent."""
+        for name in self.agents():
+            rows = self.hot_functions(name, n)
+            if self.mode == "cprofile":
+                measured = sum(row[2] for row in pstats.Stats(self.profiles[name]).stats.values())  # Traced time
+                details = ""
+            else:
+                measured = self.cpu_time[name]
+                details = f", {sum(self.stacks[name].values())} samples"
+            print(f"\n{name}: {self.cpu_time[name]:.3f} s CPU profiled ({self.mode}{details})")
+            print(f"{'self %':>7} {'total %':>7} {'self s':>8} {'calls':>9}  function")
+            for label, own, total, calls in rows:
+                print(f"{100 * own / (measured or 1):7.1f} {100 * total / (measured or 1):7.1f} {own:8.3f} "
+                      f"{'' if calls is None else calls:>9}  {label}")
+
+    def write(self, path):
+        """
+        Write the profile out: collapsed stacks of all agents in "sample" mode, one pstats file per agent
+        in "cprofile" mode (the agent name goes before the extension, e.g. search.Depth_4.prof).
+        :return: List of the written paths
+        """
+        if self.mode == "sample":
+            with open(path, "w") as f:
+                for name in self.agents():
+                    for stack, count in self.stacks[name].items():
+                        f.write(f"{stack} {count}\n")
+            return [path]
+        root, extension = os.path.splitext(path)
+        paths = []
+        for name, profile in self.profiles.items():
+            paths.append(f"{root}.{re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_')}{extension or '.prof'}")
+            profile.dump_stats(paths[-1])
+        return paths
+
+
+def profile_games(specs, num_games=1, seed=None, profiler=None, rows=None, columns=None):
+    """
+    Play games between two agents with their searches profiled.
+    :param specs: Agent specifications of player 1 and player 2 (see SelfPlay.make_agent)
+    :param num_games: Number of games to play
+    :param seed: Seed of the games
+    :param profiler: SearchProfiler to fill (default: a new sampling profiler); its timer is stopped at the end
+    :param rows: Number of board rows (default: the standard board)
+    :param columns: Number of board columns (default: the standard board)
+    :return: The SearchProfiler
+    """
+    profiler = profiler if profiler is not None else SearchProfiler()
+    agents = [make_agent(spec) for spec in specs]
+    names = [f"{spec} (player {player})" if specs[0] == specs[1] else spec for player, spec in enumerate(specs, 1)]
+    board_size = {key: value for key, value in (("rows", rows), ("columns", columns)) if value is not None}
+    for game_index in range(num_games):
+        seed_agents(agents, game_seed(seed, game_index))
+        game = Connect4(**board_size)
+        while True:
+            player = game.current_player
+            profiler.start(names[player - 1])
+            col = request_move(agents[player - 1], game)
+            profiler.stop()
+            game.drop_piece(col)
+            if game.check_winner() or game.is_draw():
+                break
+            game.switch_player()
+    profiler.close()
+    return profiler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the searches of two agents over a few games.")
+    parser.add_argument("agents", nargs=2, metavar=("PLAYER1", "PLAYER2"),
+                        help=f"Agent specifications, e.g. pruning:5 or mcts:300 ({', '.join(AGENT_TYPES)})")
+    parser.add_argument("--games", type=int, default=1, help="Number of games to play")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the games")
+    parser.add_argument("--mode", choices=MODES, default="sample", help="Stack sampling or cProfile tracing")
+    parser.add_argument("--interval", type=float, default=0.005, help="Seconds of CPU time between samples")
+    parser.add_argument("--top", type=int, default=15, help="Rows of the hot function tables")
+    parser.add_argument("--out", default=None,
+                        help="Collapsed stack file (sample mode) or pstats file prefix (cprofile mode)")
+    parser.add_argument("--rows", type=int, default=None, help="Number of board rows")
+    parser.add_argument("--columns", type=int, default=None, help="Number of board columns")
+    args = parser.parse_args()
+
+    profiler = profile_games(args.agents, args.games, args.seed, SearchProfiler(args.mode, args.interval, args.top),
+                             args.rows, args.columns)
+    profiler.print_top()
+    if args.out is not None:
+        print(f"\nWrote {', '.join(profiler.write(args.out))}")
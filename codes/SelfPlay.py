@@ -0,0 +1,227 @@
+import argparse
+import os
+from multiprocessing import Pool
+
+import numpy as np
+from Bitboard import WIDTH, Position, mirror
+from BoardHeuristic import BoardHeuristicAI
+from Environment import Connect4
+from FeatureBasedHeuristic import FeatureBasedHeuristicAgent
+from Minimax_variations import MinimaxAI, MinimaxAIWithPruning
+from MonteCarloTreeSearch import MCTS
+from RandomAgent import RandomAgent
+from Solver import SolverAgent
+from Utility import game_seed, request_move, seed_agents
+
+# One row per position played. Positions are stored in their canonical (mirror-reduced) orientation,
+# relative to the side to move like Bitboard.Position: `position` holds the mover's discs, `mask` all discs.
+# `score` is the search value the agent reported for the mover (stats["value"]: positive is good for the mover,
+# +-inf a proven win or loss), on that agent's own scale; it is nan for agents that report no value (random, board,
+# feature), see scored_samples. `result` is the final result for the mover.
+SAMPLE_DTYPE = np.dtype([
+    ("position", "<u8"), ("mask", "<u8"), ("player", "u1"), ("move", "u1"), ("score", "<f4"), ("result", "i1"),
+])
+
+# Agent specifications: name, optionally followed by ":<strength>" (depth, simulations, or "weak" for the solver)
+AGENT_TYPES = {
+    "random": lambda strength: RandomAgent(),
+    "board": lambda strength: BoardHeuristicAI(),
+    "feature": lambda strength: FeatureBasedHeuristicAgent(),
+    "minimax": lambda strength: MinimaxAI(int(strength or 3)),
+    "pruning": lambda strength: MinimaxAIWithPruning(int(strength or 4)),
+    "mcts": lambda strength: MCTS(Connect4(), simulations=int(strength or 200)),
+    "solver": lambda strength: SolverAgent(weak=strength == "weak"),
+}
+
+
+COUNTED_STRENGTHS = ("minimax", "pruning", "mcts")  # Agent types whose strength is a number (depth, simulations)
+
+
+def parse_agent_spec(spec):
+    """
+    Split and check an agent specification without building the agent (a solver allocates its whole table).
+    :return: (agent type, strength string, "" if none)
+    :raises ValueError: If the agent type is unknown or the strength is not one it takes
+    """
+    name, _, strength = spec.partition(":")
+    if name not in AGENT_TYPES:
+        raise ValueError(f"Unknown agent {spec!r}; choose from {', '.join(AGENT_TYPES)}.")
+    if name in COUNTED_STRENGTHS:
+        valid, expected = not strength or strength.isdigit(), "a number"
+    elif name == "solver":
+        valid, expected = strength in ("", "weak"), '"weak"'
+    else:
+        valid, expected = not strength, "no strength"
+    if not valid:
+        raise ValueError(f"Bad strength in {spec!r}: {name} takes {expected}.")
+    return name, strength
+
+
+def make_agent(spec):
+    """
+    Build an agent from a specification such as "pruning:4", "minimax:3", "mcts:200" or "random".
+    :raises ValueError: If the specification is invalid (see parse_agent_spec)
+    """
+    name, strength = parse_agent_spec(spec)
+    return AGENT_TYPES[name](strength)
+
+
+def mover_score(agent):
+    """
+    Value of the move an agent just chose, for the player who made it (every agent reports its stats["value"]
+    that way), or nan if the agent reports none.
+    """
+    value = getattr(agent, "stats", {}).get("value")
+    return np.nan if value is None else float(value)
+
+
+_AGENTS = {}  # Agents of the current worker process, built once per (player, specification)
+
+
+def play_game(specs, seed, game_index):
+    """
+    Worker entry point: play one game and label every position in it.
+    :param specs: Agent specifications of player 1 and player 2
+    :param seed: Dataset seed; the game's seed is derived from it and the game index
+    :param game_index: Index of the game in the dataset
+    :return: Array of SAMPLE_DTYPE rows, one per move
+    """
+    for player, spec in enumerate(specs, 1):
+        if (player, spec) not in _AGENTS:
+            _AGENTS[player, spec] = make_agent(spec)
+    agents = [_AGENTS[player, spec] for player, spec in enumerate(specs, 1)]
+    seed_agents(agents, game_seed(seed, game_index))
+
+    game = Connect4()
+    rows = []
+    winner = 0
+    while True:
+        agent = agents[game.current_player - 1]
+        col = request_move(agent, game)
+        position = Position.from_board(game.board, game.current_player)
+        score = mover_score(agent)
+        key = position.key()
+        if mirror(key) < key:  # Canonical orientation: mirror the position and the move
+            rows.append((mirror(position.current_position), mirror(position.mask), game.current_player,
+                         WIDTH - 1 - col, score))
+        else:
+            rows.append((position.current_position, position.mask, game.current_player, col, score))
+        game.drop_piece(col)
+        if game.check_winner():
+            winner = game.current_player
+            break
+        if game.is_draw():
+            break
+        game.switch_player()
+
+    return np.array([row + (0 if not winner else 1 if row[2] == winner else -1,) for row in rows], dtype=SAMPLE_DTYPE)
+
+
+def _play_game_job(args):
+    return play_game(*args)
+
+
+class DatasetWriter:
+    """Writes samples to numbered .npy chunks, keeping only the first sample of every position."""
+
+    def __init__(self, directory, chunk_size=1 << 20):
+        """
+        :param directory: Output directory, created if needed
+        :param chunk_size: Samples per chunk file
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.seen = set(self.existing_keys())  # Position keys already in the dataset
+        self.chunks = len(chunk_files(directory))
+        self.buffer = np.empty(chunk_size, dtype=SAMPLE_DTYPE)
+        self.buffered = 0
+        self.written = 0
+        self.duplicates = 0
+
+    def existing_keys(self):
+        """Keys of the positions in chunks written earlier, so that a dataset can be extended."""
+        for chunk in load_dataset(self.directory):
+            yield from (chunk["position"] + chunk["mask"]).tolist()
+
+    def add(self, samples):
+        """Buffer the samples of new positions, flushing full chunks to disk."""
+        for sample in samples:
+            key = int(sample["position"]) + int(sample["mask"])
+            if key in self.seen:
+                self.duplicates += 1
+                continue
+            self.seen.add(key)
+            self.buffer[self.buffered] = sample
+            self.buffered += 1
+            if self.buffered == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """Write the buffered samples as a new chunk."""
+        if self.buffered:
+            np.save(os.path.join(self.directory, f"chunk_{self.chunks:05d}.npy"), self.buffer[:self.buffered])
+            self.chunks += 1
+            self.written += self.buffered
+            self.buffered = 0
+
+
+def chunk_files(directory):
+    """Chunk files of a dataset, in order."""
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith("chunk_") and name.endswith(".npy"))
+
+
+def load_dataset(directory):
+    """
+    Open every chunk of a dataset as a read-only memory map.
+    :return: List of SAMPLE_DTYPE arrays
+    """
+    return [np.load(path, mmap_mode="r") for path in chunk_files(directory)]
+
+
+def scored_samples(samples):
+    """Samples with a search score, i.e. those played by agents that report values."""
+    return samples[~np.isnan(samples["score"])]
+
+
+def generate_dataset(directory, num_games, agents=("pruning:4", "pruning:4"), seed=None, workers=1,
+                     chunk_size=1 << 20):
+    """
+    Play games between two agents and stream their labeled positions to a dataset directory.
+    :param directory: Output directory
+    :param num_games: Number of games to play
+    :param agents: Agent specifications of player 1 and player 2 (see make_agent)
+    :param seed: Dataset seed; game i always gets the same seed whatever the number of workers
+    :param workers: Number of game-playing processes
+    :param chunk_size: Samples per chunk file
+    :return: DatasetWriter with the counts of written and duplicate samples
+    """
+    for spec in agents:
+        parse_agent_spec(spec)  # Fail early on a bad specification
+    writer = DatasetWriter(directory, chunk_size)
+    jobs = ((tuple(agents), seed, game_index) for game_index in range(num_games))
+    if workers > 1:
+        with Pool(workers) as pool:
+            for samples in pool.imap(_play_game_job, jobs, chunksize=4):
+                writer.add(samples)
+    else:
+        for job in jobs:
+            writer.add(_play_game_job(job))
+    writer.flush()
+    return writer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a labeled Connect-4 position dataset by self-play.")
+    parser.add_argument("output", help="Dataset directory (chunks are added to an existing dataset)")
+    parser.add_argument("--games", type=int, default=1000, help="Number of games to play")
+    parser.add_argument("--agents", nargs=2, default=["pruning:4", "pruning:4"], metavar=("PLAYER1", "PLAYER2"),
+                        help=f"Agent specifications, e.g. pruning:4 or mcts:200 ({', '.join(AGENT_TYPES)})")
+    parser.add_argument("--seed", type=int, default=None, help="Dataset seed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of processes")
+    parser.add_argument("--chunk-size", type=int, default=1 << 20, help="Samples per chunk file")
+    args = parser.parse_args()
+
+    writer = generate_dataset(args.output, args.games, args.agents, args.seed, args.workers, args.chunk_size)
+    print(f"Wrote {writer.written} positions to {args.output} ({writer.duplicates} duplicates skipped)")
@@ -0,0 +1,293 @@
+import sys
+from array import array
+
+import numpy as np
+from Bitboard import Position, STANDARD
+from Utility import make_rng
+
+# Score of a position for the side to move: positive when it wins, larger the sooner it wins
+# ((cells + 1 - moves) // 2 when winning with its next disc), negative for losses, 0 for draws.
+# The bounds below are those of the standard board; a Solver uses the bounds of its layout.
+MIN_SCORE = -STANDARD.cells // 2 + 3
+MAX_SCORE = (STANDARD.cells + 1) // 2 - 3
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table storing an upper bound of the score per position key.
+    Only the low 32 bits of each key are stored: with a table size above 2**17 (and odd),
+    the slot index and the stored bits together still identify a standard-board key uniquely.
+    Larger boards have longer keys and store 64 bits, or the whole key beyond that.
+    """
+
+    def __init__(self, size=4_194_301, key_bits=STANDARD.key_bits, max_value=127):
+        """
+        :param size: Number of slots, an odd number (preferably prime) above 2**17
+        :param key_bits: Bit length of the keys (see BitboardLayout.key_bits)
+        :param max_value: Largest value stored
+        """
+        if size <= 1 << 17 or size % 2 == 0:
+            raise ValueError("Transposition table size must be odd and larger than 2**17.")
+        self.size = size
+        stored_bits = key_bits - (size.bit_length() - 1)  # Key bits the slot index does not give away
+        self.key_typecode = "I" if stored_bits <= 32 else "Q" if stored_bits <= 64 else None
+        self.key_mask = {"I": 0xFFFFFFFF, "Q": 0xFFFFFFFFFFFFFFFF, None: -1}[self.key_typecode]
+        self.value_typecode = "b" if max_value <= 127 else "h"
+        self.reset()
+
+    def put(self, key, value):
+        index = key % self.size
+        self.keys[index] = key & self.key_mask
+        self.values[index] = value
+
+    def get(self, key):
+        """Return the stored value, or 0 when the key is missing."""
+        index = key % self.size
+        return self.values[index] if self.keys[index] == key & self.key_mask else 0
+
+    def memory_usage(self):
+        """Size of the table and number of filled slots (see MemoryProfile)."""
+        entries = int(np.count_nonzero(np.frombuffer(self.values, dtype=self.value_typecode)))
+        return {"bytes": sys.getsizeof(self.keys) + sys.getsizeof(self.values), "entries": entries}
+
+    def reset(self):
+        if self.key_typecode is None:
+            self.keys = [0] * self.size
+        else:
+            self.keys = array(self.key_typecode, bytes(array(self.key_typecode).itemsize * self.size))
+        self.values = array(self.value_typecode, bytes(array(self.value_typecode).itemsize * self.size))
+
+
+class Solver:
+    """
+    Strong Connect-4 solver: negamax over bitboards with alpha-beta pruning, a transposition
+    table of upper bounds, anticipation of losing moves and iterative null-window search.
+    It solves positions of the board size of its layout, and switches to the size of any other position it is given.
+    """
+
+    def __init__(self, table_size=4_194_301, layout=STANDARD):
+        """
+        :param table_size: Number of transposition table slots
+        :param layout: BitboardLayout of the board size to solve
+        """
+        self.table_size = table_size
+        self.node_count = 0
+        self.set_layout(layout)
+
+    def set_layout(self, layout):
+        """Solve positions of another board size from now on (with a fresh table)."""
+        self.layout = layout
+        self.cells = layout.cells
+        self.min_score = -layout.cells // 2 + 3
+        self.max_score = (layout.cells + 1) // 2 - 3
+        self.table = TranspositionTable(self.table_size, layout.key_bits, self.max_score - self.min_score + 1)
+
+    def memory_usage(self):
+        """Retained state by component (see MemoryProfile)."""
+        return {"solver_table": self.table.memory_usage()}
+
+    def negamax(self, position, alpha, beta):
+        """
+        Exact score of a position within an (alpha, beta) window.
+        Results outside the window are bounds: a score <= alpha is an upper bound and a
+        score >= beta a lower bound of the true score.
+        :param position: Bitboard Position where the side to move cannot win immediately
+        """
+        self.node_count += 1
+        layout = self.layout
+        cells = self.cells
+        winning_positions = layout.winning_positions
+        moves = position.moves
+        current_position, mask = position.current_position, position.mask
+
+        # Anticipate losing moves: block an opponent win, never play below one
+        possible = position.possible()
+        opponent_win = winning_positions(current_position ^ mask, mask)
+        forced_moves = possible & opponent_win
+        if forced_moves:
+            if forced_moves & (forced_moves - 1):
+                return -((cells - moves) // 2)  # Two threats to block: we lose
+            possible = forced_moves
+        non_losing = possible & ~(opponent_win >> 1)
+        if not non_losing:
+            return -((cells - moves) // 2)
+        if moves >= cells - 2:
+            return 0  # Draw
+
+        # Lower bound: the opponent cannot win with its next disc
+        min_score = -((cells - 2 - moves) // 2)
+        if alpha < min_score:
+            alpha = min_score
+            if alpha >= beta:
+                return alpha
+
+        # Upper bound: we cannot win with our next disc
+        max_score = (cells - 1 - moves) // 2
+        key = current_position + mask
+        key = min(key, layout.mirror(key))  # Mirrored positions share their table entry
+        stored = self.table.get(key)
+        if stored:
+            max_score = stored + self.min_score - 1
+        if beta > max_score:
+            beta = max_score
+            if alpha >= beta:
+                return beta
+
+        # Try the moves creating the most winning cells first, center columns breaking ties
+        candidates = []
+        column_mask = layout.column_mask
+        for col in layout.center_order:
+            move = non_losing & column_mask(col)
+            if move:
+                candidates.append((-winning_positions(current_position | move, mask).bit_count(), len(candidates), move))
+        candidates.sort()
+
+        for _, _, move in candidates:
+            child = layout.Position(current_position, mask, moves)
+            child.play(move)
+            score = -self.negamax(child, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.table.put(key, max(alpha, self.min_score) - self.min_score + 1)  # Stored values are always > 0
+        return alpha
+
+    def solve(self, position, weak=False):
+        """
+        Exact score of a position for the side to move.
+        :param position: Bitboard Position
+        :param weak: Only determine the sign of the score (win / draw / loss), which is faster
+        """
+        if position.layout is not self.layout:
+            self.set_layout(position.layout)
+        if position.can_win_next():
+            return (self.cells + 1 - position.moves) // 2
+        low = -((self.cells - position.moves) // 2)
+        high = (self.cells + 1 - position.moves) // 2
+        if weak:
+            low, high = -1, 1
+
+        # Narrow the score down with null-window searches, probing near zero first
+        while low < high:
+            med = low + (high - low) // 2
+            if med <= 0 and int(low / 2) < med:
+                med = int(low / 2)
+            elif med >= 0 and int(high / 2) > med:
+                med = int(high / 2)
+            result = self.negamax(position, med, med + 1)
+            if result <= med:
+                high = result
+            else:
+                low = result
+        return low
+
+    def analyze(self, position, weak=False):
+        """
+        Exact score of every column for the side to move.
+        In a symmetric position only the left half is solved and mirrored.
+        :return: List of scores, None for full columns
+        """
+        width = position.layout.width
+        scores = [None] * width
+        symmetric = position.is_symmetric()
+        for col in range(width):
+            if not position.can_play(col):
+                continue
+            if symmetric and col > (width - 1) // 2:
+                scores[col] = scores[width - 1 - col]
+                continue
+            if position.is_winning_move(col):
+                scores[col] = (position.layout.cells + 1 - position.moves) // 2
+            else:
+                child = position.copy()
+                child.play_col(col)
+                scores[col] = -self.solve(child, weak)
+        return scores
+
+    def best_move(self, position):
+        """
+        Best column for the side to move, center columns breaking ties.
+        :return: (column, exact score)
+        """
+        scores = self.analyze(position)
+        col = max((col for col in position.layout.center_order if scores[col] is not None), key=lambda c: scores[c])
+        return col, scores[col]
+
+
+class SolverSearch:
+    """Picklable search callable for OpeningBook.build_opening_book; one solver per process."""
+
+    def __init__(self, table_size=4_194_301):
+        self.table_size = table_size
+        self.solver = None
+
+    def __getstate__(self):
+        return {"table_size": self.table_size, "solver": None}
+
+    def __call__(self, position):
+        if self.solver is None:
+            self.solver = Solver(self.table_size)
+        return self.solver.best_move(position)
+
+
+class SolverAgent:
+    """Perfect-play agent backed by the strong solver, optionally starting from an opening book."""
+
+    def __init__(self, rng=None, table_size=4_194_301, book=None, weak=False):
+        """
+        :param rng: Seed or numpy Generator used for tie-breaking
+        :param table_size: Number of transposition table slots
+        :param book: Optional OpeningBook consulted before solving
+        :param weak: Only distinguish wins, draws and losses (faster, less precise play)
+        """
+        self.rng = make_rng(rng)
+        self.solver = Solver(table_size)
+        self.book = book
+        self.weak = weak
+        self.stats = {}
+
+    def memory_usage(self):
+        """Retained state by component (see MemoryProfile)."""
+        return self.solver.memory_usage()
+
+    def get_best_move(self, game):
+        """Get the move with the best exact score for the player to move."""
+        position = Position.from_board(game.board, game.current_player)
+        if self.book is not None:
+            entry = self.book.lookup(position)
+            if entry is not None:
+                self.stats = {"value": entry[1], "nodes": 0}
+                return entry[0]
+        nodes = self.solver.node_count
+        scores = self.solver.analyze(position, self.weak)
+        value = max(score for score in scores if score is not None)
+        best_columns = [col for col, score in enumerate(scores) if score == value]
+        self.stats = {"value": value, "nodes": self.solver.node_count - nodes}
+        return best_columns[self.rng.integers(len(best_columns))]
+
+
+class SolverOracle:
+    """Grades moves against exact scores, for positions small enough to solve quickly."""
+
+    def __init__(self, max_empty_cells=16, table_size=4_194_301):
+        """
+        :param max_empty_cells: Only grade positions with at most this many empty cells
+        :param table_size: Number of transposition table slots
+        """
+        self.max_empty_cells = max_empty_cells
+        self.solver = Solver(table_size)
+
+    def grade(self, game, col):
+        """
+        Compare a move with the best one for the player to move.
+        :param game: Connect4 game instance before the move is played
+        :param col: Column chosen by the agent
+        :return: (score of the chosen move, best score), or None when the position is too large
+        """
+        position = Position.from_board(game.board, game.current_player)
+        if position.layout.cells - position.moves > self.max_empty_cells:
+            return None
+        scores = self.solver.analyze(position)
+        return scores[col], max(score for score in scores if score is not None)
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+def make_rng(seed=None):
+    """
+    Build the random generator an agent draws all of its randomness from.
+    :param seed: None, an int, a SeedSequence or an existing Generator
+    :return: numpy.random.Generator
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def game_seed(base_seed, game_index, worker_id=0):
+    """
+    Derive the seed of one game in a tournament.
+    The seed only depends on (base_seed, worker_id, game_index), so a game can be
+    replayed on its own and workers never share a stream.
+    :param base_seed: Tournament seed (None draws fresh entropy)
+    :param game_index: Index of the game within the worker's run
+    :param worker_id: Index of the worker process running the game
+    :return: numpy.random.SeedSequence
+    """
+    return np.random.SeedSequence(entropy=base_seed, spawn_key=(worker_id, game_index))
+
+
+def seed_agents(agents, seed_sequence):
+    """Give every agent of a game its own generator spawned from the game seed."""
+    for agent, child in zip(agents, seed_sequence.spawn(len(agents))):
+        agent.rng = np.random.default_rng(child)
+
+
+def request_move(agent, game):
+    """
+    Ask any agent of the project for its move, whatever its calling convention.
+    :param agent: Agent exposing get_move(game), get_best_move(game), or an MCTS bound to a game
+    :param game: Connect4 game instance
+    :return: Column index of the move
+    """
+    if hasattr(agent, "get_move"):
+        return agent.get_move(game)
+    if hasattr(agent, "game"):  # MCTS agents search the game they hold
+        agent.game = game
+        return agent.get_best_move()
+    return agent.get_best_move(game)
@@ -0,0 +1,197 @@
+import argparse
+
+import numpy as np
+from Bitboard import WIDTH, HEIGHT, H1
+from BoardHeuristic import BoardHeuristicAI
+from FeatureBasedHeuristic import FeatureBasedHeuristicAgent
+from HeuristicWeights import load_weights, save_weights
+from Minimax_variations import MinimaxAI
+from SelfPlay import load_dataset
+from WindowTables import gather_windows, window_counts
+
+# Bit of every board cell in the bitboard layout, shape (rows, columns)
+CELL_SHIFTS = np.array([[col * H1 + row for col in range(WIDTH)] for row in range(HEIGHT)], dtype=np.uint64)
+MODELS = ("feature", "board", "minimax")
+
+
+def sample_boards(samples):
+    """
+    Rebuild the boards reached by the moves of a batch of dataset samples.
+    :param samples: SAMPLE_DTYPE array (see SelfPlay)
+    :return: (boards of shape (N, rows, columns) after the move, player who moved in each)
+    """
+    players = samples["player"].astype(np.int8)
+    own = ((samples["position"][:, np.newaxis, np.newaxis] >> CELL_SHIFTS) & 1).astype(np.int8)
+    occupied = ((samples["mask"][:, np.newaxis, np.newaxis] >> CELL_SHIFTS) & 1).astype(np.int8)
+    movers = players[:, np.newaxis, np.newaxis]
+    boards = own * movers + (occupied - own) * (3 - movers)
+
+    # Drop the mover's disc into the chosen column
+    index = np.arange(len(samples))
+    moves = samples["move"].astype(np.intp)
+    heights = occupied.sum(axis=1)[index, moves]
+    boards[index, heights, moves] = players
+    return boards, players
+
+
+def feature_model_features(boards, players):
+    """FeatureBasedHeuristicAgent features: threes with one and two options, then the occupied columns."""
+    _, threes_two_options, threes_one_option = FeatureBasedHeuristicAgent().batch_window_features(boards, players)
+    return np.column_stack([threes_one_option, threes_two_options, (boards != 0).any(axis=1)])
+
+
+def board_model_features(boards, players):
+    """BoardHeuristicAI features: +1 for every cell holding the mover's disc, -1 for the opponent's."""
+    movers = players[:, np.newaxis, np.newaxis]
+    return ((boards == movers).astype(np.int8) - (boards == 3 - movers)).reshape(len(boards), -1)
+
+
+def minimax_model_features(boards, players):
+    """
+    evaluate_board features: center column discs, fours in a row and the positional score (with the untuned
+    heuristic matrix), mover's minus opponent's.
+    """
+    movers = players[:, np.newaxis, np.newaxis]
+    center = boards[:, :, WIDTH // 2]
+    windows = gather_windows(boards)
+    fours = (windows == movers).all(axis=2).sum(axis=1) - (windows == 3 - movers).all(axis=2).sum(axis=1)
+    positional = (np.array(window_counts(HEIGHT, WIDTH)) * ((boards == movers).astype(np.int8) - (boards == 3 - movers))).sum(axis=(1, 2))
+    return np.column_stack([(center == players[:, np.newaxis]).sum(axis=1) - (center == 3 - players[:, np.newaxis]).sum(axis=1),
+                            fours, positional])
+
+
+FEATURES = {"feature": feature_model_features, "board": board_model_features, "minimax": minimax_model_features}
+
+
+def current_weights(model, weights):
+    """Weight vector of a model as the agents currently use it (built-in or loaded)."""
+    if model == "feature":
+        feature_weights = FeatureBasedHeuristicAgent(weights=weights).feature_weights
+        return np.array([feature_weights["three_with_one_option"][0], feature_weights["three_with_two_options"]]
+                        + list(feature_weights["unconnected"]), dtype=float)
+    if model == "board":
+        return BoardHeuristicAI(weights=weights).heuristic_matrix.astype(float).ravel()
+    agent = MinimaxAI(1, weights=weights)
+    return np.array([agent.center_weight, agent.four_weight, agent.positional_weight], dtype=float)
+
+
+def weight_section(model, vector, weights):
+    """Turn a fitted weight vector back into the model's weight file section."""
+    vector = np.round(vector, 3)
+    if model == "feature":
+        feature_weights = dict(FeatureBasedHeuristicAgent(weights=weights).feature_weights)
+        feature_weights.pop("win")  # Stays infinite
+        feature_weights["three_with_one_option"] = [float(vector[0])] + list(feature_weights["three_with_one_option"][1:])
+        feature_weights["three_with_two_options"] = float(vector[1])
+        feature_weights["unconnected"] = vector[2:].tolist()
+        return "feature_weights", feature_weights
+    if model == "board":
+        return "heuristic_matrix", vector.reshape(HEIGHT, WIDTH).tolist()
+    return "evaluate_board", {"center": float(vector[0]), "four": float(vector[1]), "positional": float(vector[2])}
+
+
+def symmetrize(model, vector):
+    """Average a weight vector with its mirror image; the dataset only holds one orientation per position."""
+    if model == "feature":
+        vector[2:] = (vector[2:] + vector[2:][::-1]) / 2
+    elif model == "board":
+        matrix = vector.reshape(HEIGHT, WIDTH)
+        vector = ((matrix + matrix[:, ::-1]) / 2).ravel()
+    return vector
+
+
+def load_features(directory, model, batch_size=1 << 16, max_samples=None):
+    """
+    Compute the features and targets of a dataset in vectorized batches, reading the chunks memory-mapped.
+    :return: (features of shape (N, F), targets in [0, 1]: 1 win, 0.5 draw, 0 loss for the mover)
+    """
+    features, targets = [], []
+    remaining = max_samples
+    for chunk in load_dataset(directory):
+        for start in range(0, len(chunk), batch_size):
+            batch = np.asarray(chunk[start:start + (batch_size if remaining is None else min(batch_size, remaining))])
+            boards, players = sample_boards(batch)
+            features.append(FEATURES[model](boards, players).astype(np.float32))
+            targets.append((batch["result"] + 1) / 2)
+            if remaining is not None:
+                remaining -= len(batch)
+                if remaining <= 0:
+                    return np.concatenate(features), np.concatenate(targets)
+    return np.concatenate(features), np.concatenate(targets)
+
+
+def log_loss(logits, targets):
+    """Mean cross-entropy of sigmoid(logits) against soft targets."""
+    return float(np.mean(np.logaddexp(0, logits) - targets * logits))
+
+
+def texel_tune(features, targets, initial, ridge=1e-3, iterations=25):
+    """
+    Texel-style tuning: pick the scale K that best maps the current evaluation to the game result,
+    then fit the weights by logistic regression (Newton's method) with K fixed, so that the tuned
+    weights stay on the agent's own scale.
+    Features that never occur keep their current weight.
+    :param features: Array of shape (N, F)
+    :param targets: Results in [0, 1]
+    :param initial: Current weights, length F
+    :param ridge: L2 penalty pulling the weights towards the current ones
+    :return: (tuned weights, K, loss with the current weights, loss with the tuned weights)
+    """
+    features = features.astype(float)
+    current_eval = features @ initial
+    scales = np.logspace(-8, 2, 201)
+    K = scales[np.argmin([log_loss(scale * current_eval, targets) for scale in scales])]
+    initial_loss = log_loss(K * current_eval, targets)
+
+    active = features.any(axis=0)
+    prior = K * initial[active]
+    logit_weights = prior.copy()
+    x = features[:, active]
+    fixed = features[:, ~active] @ (K * initial[~active])
+    for _ in range(iterations):
+        logits = x @ logit_weights + fixed
+        p = 1 / (1 + np.exp(-logits))
+        gradient = x.T @ (p - targets) / len(targets) + ridge * (logit_weights - prior)
+        hessian = (x * (p * (1 - p))[:, np.newaxis]).T @ x / len(targets) + ridge * np.eye(len(logit_weights))
+        step = np.linalg.solve(hessian, gradient)
+        logit_weights -= step
+        if np.abs(step).max() < 1e-9:
+            break
+
+    tuned = initial.copy()
+    tuned[active] = logit_weights / K
+    return tuned, K, initial_loss, log_loss(features @ tuned * K, targets)
+
+
+def tune(directory, output, models=MODELS, weights=None, batch_size=1 << 16, max_samples=None, ridge=1e-3):
+    """
+    Tune the weights of the given models on a dataset and write them to a weight file.
+    :param directory: Dataset directory written by SelfPlay.py
+    :param output: Weight file to write
+    :param models: Models to tune: "feature", "board" and/or "minimax"
+    :param weights: Starting weights (weight file or dict); None starts from the built-in ones
+    :return: Dict of the written weight sections
+    """
+    tuned = dict(load_weights(weights))
+    for model in models:
+        features, targets = load_features(directory, model, batch_size, max_samples)
+        vector, K, before, after = texel_tune(features, targets, current_weights(model, weights), ridge)
+        section, values = weight_section(model, symmetrize(model, vector), weights)
+        tuned[section] = values
+        print(f"{model}: {len(targets)} positions, K={K:.3g}, loss {before:.5f} -> {after:.5f}")
+    save_weights(output, tuned)
+    return tuned
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune the heuristic weights on a self-play dataset.")
+    parser.add_argument("dataset", help="Dataset directory written by SelfPlay.py")
+    parser.add_argument("output", help="Weight file to write (load it with CONNECT4_WEIGHTS=<file>)")
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=list(MODELS), help="Weights to tune")
+    parser.add_argument("--start", default=None, help="Weight file to start from")
+    parser.add_argument("--batch-size", type=int, default=1 << 16, help="Positions per feature batch")
+    parser.add_argument("--max-samples", type=int, default=None, help="Only use the first positions")
+    parser.add_argument("--ridge", type=float, default=1e-3, help="L2 penalty towards the starting weights")
+    args = parser.parse_args()
+
+    tune(args.dataset, args.output, args.models, args.start, args.batch_size, args.max_samples, args.ridge)
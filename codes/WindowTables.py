@@ -0,0 +1,49 @@
+import numpy as np
+from functools import lru_cache
+
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]  # Horizontal, vertical, diagonals
+
+
+@lru_cache(maxsize=None)
+def get_windows(rows, columns, length=4):
+    """
+    Precompute the flat board indices of every in-bounds window of `length` cells.
+    Each row starts at the window's anchor cell and steps along one of DIRECTIONS,
+    so column 0 of a gathered window is always its anchor.
+    :param rows: Number of board rows
+    :param columns: Number of board columns
+    :param length: Number of cells per window
+    :return: Read-only integer array of shape (num_windows, length)
+    """
+    windows = []
+    for r in range(rows):
+        for c in range(columns):
+            for dr, dc in DIRECTIONS:
+                end_r, end_c = r + dr * (length - 1), c + dc * (length - 1)
+                if 0 <= end_r < rows and 0 <= end_c < columns:
+                    windows.append([(r + dr * i) * columns + c + dc * i for i in range(length)])
+    table = np.array(windows, dtype=np.intp).reshape(-1, length)
+    table.flags.writeable = False
+    return table
+
+
+def gather_windows(boards):
+    """
+    Gather the contents of every window of a board, or of a stack of boards.
+    :param boards: Array of shape (..., rows, columns)
+    :return: Array of shape (..., num_windows, 4)
+    """
+    rows, columns = boards.shape[-2:]
+    return boards.reshape(*boards.shape[:-2], rows * columns)[..., get_windows(rows, columns)]
+
+
+@lru_cache(maxsize=None)
+def window_counts(rows, columns, length=4):
+    """
+    Number of windows every cell belongs to, the classic Connect-4 cell values
+    (3 in the corners up to 13 in the middle of the standard board).
+    :return: Read-only integer array of shape (rows, columns)
+    """
+    counts = np.bincount(get_windows(rows, columns, length).ravel(), minlength=rows * columns).reshape(rows, columns)
+    counts.flags.writeable = False
+    return counts
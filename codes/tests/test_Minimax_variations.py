@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from Environment import Connect4
+from Minimax_variations import MinimaxAIWithPruning
+
+
+def quiescence_value(board, player):
+    """Quiescence value of a leaf with `player` to move (player 1 maximizes)."""
+    game = Connect4()
+    game.board = board
+    game.current_player = player
+    agent = MinimaxAIWithPruning(1, rng=0, quiescence_depth=2)
+    agent.load_bitboards(game)
+    return agent.quiescence(game, player == 1, agent.quiescence_depth)
+
+
+@pytest.mark.parametrize("player", [1, 2])
+def test_quiescence_scores_a_four_of_the_side_to_move(player):
+    # The side to move already has four in column 0 (a line the search did not stop, as check_winner only sees
+    # one player's discs); the column is full and nobody has a threat left, so the leaf used to look quiet
+    board = np.zeros((6, 7), dtype=int)  # Row 0 at the bottom
+    board[0:4, 0] = player
+    board[4:6, 0] = 3 - player
+    board[0:2, 6] = 3 - player
+    if player == 2:
+        board[0, 3] = 1  # Player 1 has one more disc when player 2 is to move
+    expected = float("inf") if player == 1 else float("-inf")
+    assert quiescence_value(board, player) == expected
+    assert quiescence_value(board, 3 - player) == expected  # The last mover's four, already scored before
@@ -0,0 +1,19 @@
+import pickle
+
+from Bitboard import Position
+from Minimax_variations import MinimaxAIWithPruning
+from OpeningBook import BookSearch, OpeningBook, OpeningBookAgent, build_opening_book
+from Solver import SolverAgent
+
+
+def test_book_pickle_round_trip(tmp_path):
+    path = tmp_path / "book.bin"
+    build_opening_book(path, 3, BookSearch(2))
+    book = OpeningBook(path)
+    for agent in (OpeningBookAgent(MinimaxAIWithPruning(2), book), SolverAgent(book=book)):
+        copy = pickle.loads(pickle.dumps(agent))
+        assert copy.book is not book and copy.book.path == book.path
+        assert len(copy.book) == len(book)
+        for moves in ("", "4", "43", "12"):
+            position = Position.from_moves(moves)
+            assert copy.book.lookup(position) == book.lookup(position)
@@ -0,0 +1,14 @@
+import pickle
+
+from Environment import Connect4
+from ParallelSearch import LazySMPMinimax
+
+
+def test_lazy_smp_pickles_after_a_move():
+    game = Connect4()
+    with LazySMPMinimax(2, workers=2, rng=1, table_size=1 << 12) as agent:
+        agent.get_best_move(game)
+        copy = pickle.loads(pickle.dumps(agent))
+    assert copy.pool is None and copy.table is None
+    with copy:
+        assert game.is_valid_location(copy.get_best_move(game))
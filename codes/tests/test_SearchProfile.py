@@ -0,0 +1,21 @@
+import time
+
+from SearchProfile import SearchProfiler
+
+
+def busy(seconds):
+    """Burn CPU time in Python for a while."""
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def test_short_searches_add_up_to_samples():
+    with SearchProfiler(interval=0.005) as profiler:
+        for _ in range(100):  # 100 searches of 1 ms each, all shorter than the sampling interval
+            profiler.start("short")
+            busy(0.001)
+            profiler.stop()
+    samples = sum(profiler.stacks["short"].values())
+    assert samples >= 5  # About 20 expected from 0.1 s of CPU time
+    assert profiler.hot_functions("short")[0][0].startswith("busy")